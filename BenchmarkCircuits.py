@@ -0,0 +1,125 @@
+from math import pi
+
+from qiskit import QuantumCircuit
+
+"""
+The circuits the benchmarks run. Each function returns the circuit and the bit string a noiseless run of it always
+measures, so the accuracy benchmarks can count how often that comes out.
+"""
+
+
+def bernstein_vazirani(secret):
+    """
+    Bernstein-Vazirani for a secret bit string, on len(secret) + 1 qubits. All this was taken from qiskit
+    https://qiskit.org/textbook/ch-algorithms/bernstein-vazirani.html
+    """
+    n = len(secret)
+    circuit = QuantumCircuit(n + 1, n)
+    # the n+1 qubits are indexed 0...n, so the last qubit is index n
+    circuit.x(n)
+    circuit.barrier()
+    circuit.h(range(n + 1))
+    circuit.barrier()
+    for ii, yesno in enumerate(reversed(secret)):
+        if yesno == '1':
+            circuit.cx(ii, n)
+    circuit.barrier()
+    circuit.h(range(n + 1))
+    circuit.barrier()
+    # measure the qubits indexed from 0 to n-1 and store them into the classical bits indexed 0 to n-1
+    circuit.measure(range(n), range(n))
+    return circuit, secret
+
+
+def qft_rotations(circuit, n):
+    """Performs qft on the first n qubits in circuit (without swaps)"""
+    if n == 0:
+        return circuit
+    n -= 1
+    circuit.h(n)
+    for qubit in range(n):
+        circuit.cp(pi/2**(n-qubit), qubit, n)
+    # At the end of our function, we call the same function again on
+    # the next qubits (we reduced n by one earlier in the function)
+    qft_rotations(circuit, n)
+
+
+def swap_registers(circuit, n):
+    for qubit in range(n//2):
+        circuit.swap(qubit, n-qubit-1)
+    return circuit
+
+
+def qft(circuit, n):
+    """QFT on the first n qubits in circuit"""
+    qft_rotations(circuit, n)
+    swap_registers(circuit, n)
+    return circuit
+
+
+def inverse_qft(circuit, n):
+    """Does the inverse QFT on the first n qubits in circuit"""
+    qft_circ = qft(QuantumCircuit(n), n)
+    invqft_circ = qft_circ.inverse()
+    circuit.append(invqft_circ, circuit.qubits[:n])
+    # .decompose() gives the individual gates
+    return circuit.decompose()
+
+
+def qft_round_trip(secret):
+    """
+    Sets the qubits to a bit string, does the QFT and then the inverse QFT on len(secret) qubits, so it should measure
+    the bit string again
+    """
+    n = len(secret)
+    circuit = QuantumCircuit(n)
+    for ii, yesno in enumerate(reversed(secret)):
+        if yesno == '1':
+            circuit.x(ii)
+    qft(circuit, n)
+    circuit = inverse_qft(circuit, n)
+    circuit.measure_all()
+    return circuit, secret
+
+
+def toffoli(size=4):
+    """
+    A Toffoli on qubits 0 and 1 (both set to 1) into qubit 2, decomposed into CNOTs, on size qubits
+    """
+    circuit = QuantumCircuit(size)
+    circuit.x(0)
+    circuit.x(1)
+    circuit.ccx(0, 1, 2)
+    circuit.measure_all()
+    return circuit.decompose(), '0' * (size - 3) + '111'
+
+
+def default_secret(family, size):
+    # The bit strings the old benchmark scripts used, repeated out to size bits
+    pattern = '1011011' if family == 'qft' else '1101'
+    return (pattern * (size // len(pattern) + 1))[:size]
+
+
+def make_circuit(family, size, secret=None):
+    """
+    Returns (circuit, expected bit string) for one of the circuit families
+
+    Args:
+        family: 'bv', 'qft' or 'toffoli'
+        size: Length of the secret for 'bv' and 'qft', number of qubits for 'toffoli'
+        secret: Bit string to use instead of the default one
+    """
+    if family == 'toffoli':
+        if size < 3:
+            raise ValueError("A Toffoli needs at least 3 qubits")
+        return toffoli(size)
+    if secret is None:
+        secret = default_secret(family, size)
+    if family == 'bv':
+        return bernstein_vazirani(secret)
+    if family == 'qft':
+        return qft_round_trip(secret)
+    raise ValueError("Unknown circuit family " + repr(family))
+
+
+families = ('bv', 'qft', 'toffoli')
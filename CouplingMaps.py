@@ -0,0 +1,94 @@
+import random
+import networkx as nx
+
+from qiskit.transpiler import CouplingMap
+
+"""
+Coupling maps and noise graphs for trying HERR on devices of any size. The benchmark scripts build their small maps
+by hand, these are for the big heavy-hex and grid devices scalable mode is meant for.
+"""
+
+
+def heavy_hex_coupling_map(distance):
+    """
+    Returns the heavy-hex coupling map IBM's larger devices use, with links both ways. A distance of 7 is 115 qubits,
+    9 is 193 and 21 is 1081
+
+    Args:
+        distance: Code distance of the heavy-hex lattice, has to be odd
+    """
+    if distance % 2 == 0:
+        raise ValueError("Heavy-hex distance has to be odd")
+    return CouplingMap.from_heavy_hex(distance, bidirectional=True)
+
+
+def grid_coupling_map(rows, columns):
+    """
+    Returns a rows x columns grid coupling map with links both ways
+    """
+    return CouplingMap.from_grid(rows, columns, bidirectional=True)
+
+
+def square_coupling_map():
+    """
+    Returns the 4 qubit square (a ring of 4) the benchmarks use
+    """
+    return CouplingMap.from_ring(4, bidirectional=True)
+
+
+def jakarta_coupling_map():
+    """
+    Returns the coupling map of the 7 qubit ibmq_jakarta
+    """
+    return CouplingMap([[0, 1], [1, 0], [1, 2], [2, 1], [1, 3], [3, 1], [3, 5], [5, 3], [4, 5], [5, 4], [6, 5], [5, 6]])
+
+
+def named_coupling_map(name):
+    """
+    Returns a coupling map from its name, so benchmarks can take the device on the command line. The names are
+    'square', 'grid' (the 2x4 grid the benchmarks use), 'jakarta', or a generated one: 'grid-RxC', 'heavy-hex-D',
+    'line-N', 'ring-N' or 'full-N'
+    """
+    if name == 'square':
+        return square_coupling_map()
+    if name == 'grid':
+        return grid_coupling_map(2, 4)
+    if name == 'jakarta':
+        return jakarta_coupling_map()
+    kind, _, size = name.rpartition('-')
+    try:
+        sizes = [int(number) for number in size.split('x')]
+    except ValueError:
+        raise ValueError("Unknown coupling map " + repr(name))
+    if kind == 'grid' and len(sizes) == 2:
+        return grid_coupling_map(sizes[0], sizes[1])
+    if len(sizes) == 1:
+        if kind == 'heavy-hex':
+            return heavy_hex_coupling_map(sizes[0])
+        if kind == 'line':
+            return CouplingMap.from_line(sizes[0], bidirectional=True)
+        if kind == 'ring':
+            return CouplingMap.from_ring(sizes[0], bidirectional=True)
+        if kind == 'full':
+            return CouplingMap.from_full(sizes[0], bidirectional=True)
+    raise ValueError("Unknown coupling map " + repr(name))
+
+
+def random_noise_graph(couplingMap, minError=0.01, maxError=0.1, seed=None):
+    """
+    Makes a noise graph for HERR with a random error rate for each link, the same way the benchmarks do. Nodes are
+    qubits and each edge has weight 1 - error rate
+
+    Args:
+        couplingMap: Coupling map to make the noise graph for
+        minError: Lowest error rate a link can get
+        maxError: Highest error rate a link can get
+        seed: Seed for the random numbers, so the same graph can be made again
+    """
+    rng = random.Random(seed)
+    noiseGraph = nx.Graph()
+    noiseGraph.add_nodes_from(couplingMap.physical_qubits)
+    # Sorted so a seed always gives each link the same error rate
+    for edge in sorted(set(tuple(sorted(edge)) for edge in couplingMap.get_edges())):
+        noiseGraph.add_edge(edge[0], edge[1], weight=1 - rng.uniform(minError, maxError))
+    return noiseGraph
@@ -0,0 +1,179 @@
+import json
+import os
+
+"""
+Offline device profiles, so the benchmarks can get a device's basis gates, coupling map and calibration without
+logging in to IBMQ. A profile is a small JSON file:
+
+    {"name": "ibmq_lima", "numQubits": 5, "basisGates": ["id", "rz", ...], "couplingMap": [[0, 1], [1, 0], ...],
+     "calibration": "ibmq_lima.calibration.json"}
+
+where calibration is optional and is a file HERRCalibration.CalibrationLoader can read, relative to the profile.
+Profiles are looked up in the profile folder first (HERR_PROFILE_DIR, or ~/.herr/profiles) and then in the ones
+bundled below. save_backend_profile saves a live backend's profile to the folder, so it only has to be online once.
+
+Nothing here imports qiskit until a coupling map or noise graph is asked for, so reading a profile is instant.
+"""
+
+# Taken from the backends' configurations, these are what the benchmarks were run on
+bundledProfiles = {
+    'ibmq_lima': {
+        'name': 'ibmq_lima',
+        'numQubits': 5,
+        'basisGates': ['id', 'rz', 'sx', 'x', 'cx', 'reset'],
+        'couplingMap': [[0, 1], [1, 0], [1, 2], [2, 1], [1, 3], [3, 1], [3, 4], [4, 3]],
+    },
+    'ibmq_jakarta': {
+        'name': 'ibmq_jakarta',
+        'numQubits': 7,
+        'basisGates': ['id', 'rz', 'sx', 'x', 'cx', 'reset'],
+        'couplingMap': [[0, 1], [1, 0], [1, 2], [2, 1], [1, 3], [3, 1], [3, 5], [5, 3], [4, 5], [5, 4], [6, 5], [5, 6]],
+    },
+}
+defaultDevice = 'ibmq_lima'
+
+
+class DeviceProfile:
+    """
+    What the benchmarks need to know about a device
+    """
+
+    def __init__(self, name, basisGates, couplingList, numQubits=None, calibrationPath=None):
+        """
+        Args:
+            name: Name of the device, like 'ibmq_lima'
+            basisGates: List of the device's basis gate names
+            couplingList: The device's links as [qubit1, qubit2] pairs, the same as CouplingMap.get_edges()
+            numQubits: Number of qubits, defaults to one more than the highest qubit in couplingList
+            calibrationPath: Calibration file for the device, see HERRCalibration.CalibrationLoader
+        """
+        self.name = name
+        self.basisGates = list(basisGates)
+        self.couplingList = [[int(qubit1), int(qubit2)] for qubit1, qubit2 in couplingList]
+        if numQubits is None:
+            numQubits = max([max(edge) for edge in self.couplingList], default=-1) + 1
+        self.numQubits = numQubits
+        self.calibrationPath = calibrationPath
+
+    def coupling_map(self):
+        from qiskit.transpiler import CouplingMap
+        couplingMap = CouplingMap(self.couplingList)
+        # Qubits without links still belong to the device
+        for qubit in range(self.numQubits):
+            if qubit not in couplingMap.physical_qubits:
+                couplingMap.add_physical_qubit(qubit)
+        return couplingMap
+
+    def noise_graph(self, loader=None):
+        """
+        Returns the noise graph for HERR from the profile's calibration
+
+        Args:
+            loader: HERRCalibration.CalibrationLoader to read the calibration with, a new one by default
+        """
+        if self.calibrationPath is None:
+            raise ValueError("Device profile " + self.name + " has no calibration")
+        if loader is None:
+            from HERRCalibration import CalibrationLoader
+            loader = CalibrationLoader()
+        return loader.noise_graph(self.calibrationPath, self.coupling_map())
+
+    def to_dict(self, directory=None):
+        # The profile as it's saved. The calibration path is made relative to directory, so the folder can be moved
+        data = {'name': self.name, 'numQubits': self.numQubits, 'basisGates': self.basisGates,
+                'couplingMap': self.couplingList}
+        if self.calibrationPath is not None:
+            calibrationPath = self.calibrationPath
+            if directory is not None:
+                calibrationPath = os.path.relpath(calibrationPath, directory)
+            data['calibration'] = calibrationPath
+        return data
+
+
+def profile_from_dict(data, directory=None):
+    # Makes a DeviceProfile from its saved form, with the calibration path relative to directory
+    calibrationPath = data.get('calibration')
+    if calibrationPath is not None and directory is not None:
+        calibrationPath = os.path.join(directory, calibrationPath)
+    return DeviceProfile(data['name'], data['basisGates'], data['couplingMap'], data.get('numQubits'), calibrationPath)
+
+
+def profile_directory():
+    # Where saved profiles go, HERR_PROFILE_DIR if it's set
+    return os.environ.get('HERR_PROFILE_DIR') or os.path.join(os.path.expanduser('~'), '.herr', 'profiles')
+
+
+def profile_path(name, directory=None):
+    return os.path.join(directory or profile_directory(), name + '.json')
+
+
+def has_profile(name, directory=None):
+    return name in bundledProfiles or os.path.exists(profile_path(name, directory))
+
+
+def profile_names(directory=None):
+    # Every profile that can be loaded, saved and bundled
+    names = set(bundledProfiles)
+    directory = directory or profile_directory()
+    if os.path.isdir(directory):
+        names.update(fileName[:-len('.json')] for fileName in os.listdir(directory)
+                     if fileName.endswith('.json') and not fileName.endswith('.calibration.json'))
+    return sorted(names)
+
+
+def load_profile(name=defaultDevice, directory=None):
+    """
+    Returns the DeviceProfile for a device. A saved profile is used over the bundled one, so saving a backend's profile
+    updates it
+
+    Args:
+        name: Name of the device
+        directory: Profile folder, defaults to profile_directory()
+    """
+    directory = directory or profile_directory()
+    path = profile_path(name, directory)
+    if os.path.exists(path):
+        with open(path) as profileFile:
+            return profile_from_dict(json.load(profileFile), directory)
+    if name in bundledProfiles:
+        return profile_from_dict(bundledProfiles[name])
+    raise ValueError("No device profile for " + repr(name) + ", the known ones are " + ", ".join(profile_names(directory)))
+
+
+def save_profile(profile, directory=None):
+    # Writes a profile to the profile folder and returns its path
+    directory = directory or profile_directory()
+    os.makedirs(directory, exist_ok=True)
+    path = profile_path(profile.name, directory)
+    tempPath = path + '.' + str(os.getpid()) + '.tmp'
+    with open(tempPath, 'w') as profileFile:
+        json.dump(profile.to_dict(directory), profileFile, indent=1)
+    os.replace(tempPath, path)
+    return path
+
+
+def save_backend_profile(backend, directory=None):
+    """
+    Saves a live backend's basis gates, coupling map and calibration as a profile, so after that it can be loaded
+    offline. This is the only part that needs an IBMQ account:
+
+        provider = IBMQ.load_account()
+        DeviceProfiles.save_backend_profile(provider.get_backend('ibmq_lima'))
+
+    Args:
+        backend: The backend to save
+        directory: Profile folder, defaults to profile_directory()
+    """
+    directory = directory or profile_directory()
+    os.makedirs(directory, exist_ok=True)
+    configuration = backend.configuration()
+    profile = DeviceProfile(configuration.backend_name, configuration.basis_gates, configuration.coupling_map or [],
+                            configuration.n_qubits)
+    properties = backend.properties()
+    if properties is not None:
+        profile.calibrationPath = os.path.join(directory, profile.name + '.calibration.json')
+        with open(profile.calibrationPath, 'w') as calibrationFile:
+            # The properties have datetimes in them, which JSON doesn't
+            json.dump(properties.to_dict(), calibrationFile, default=str)
+    save_profile(profile, directory)
+    return profile
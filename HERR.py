@@ -1,118 +1,849 @@
+import cProfile
+import gc
 import logging
+import multiprocessing
+import time
+from collections import deque
 from copy import copy
-from itertools import cycle
+from functools import partial
+from itertools import count, cycle
 import numpy as np
-import networkx as nx
 
+from qiskit.circuit import QuantumRegister
 from qiskit.dagcircuit import DAGCircuit
 from qiskit.circuit.library.standard_gates import SwapGate
 from qiskit.transpiler.basepasses import TransformationPass
 from qiskit.transpiler.exceptions import TranspilerError
 from qiskit.transpiler.layout import Layout
-from qiskit.dagcircuit import DAGNode
+from qiskit.dagcircuit import DAGNode, DAGOpNode
+
+try:
+    from . import HERRPaths, HERRTemplate
+except ImportError:
+    # HERR.py is being used from its own folder instead of as part of the herr package
+    import HERRPaths
+    import HERRTemplate
+
+class CandidateTable:
+    """
+    The candidate edges for a gate on an ordered pair of physical qubits. All of this only depends on the coupling map,
+    accuracies are looked up by link index when the candidates get scored, so the same table works for any noise graph.
+    """
+
+    def __init__(self, edges, edgeIds, baselineEdge, baselineLinks, pathVersion):
+        # Candidate edges in the order find_better_link visits them, and their link index
+        self.edges = edges
+        self.edgeIds = edgeIds
+        # What we compare against: the link itself if the qubits are connected, otherwise the swaps on the shortest path
+        self.baselineEdge = baselineEdge
+        self.baselineLinks = baselineLinks
+        # HERR.pathVersion when baselineLinks was worked out, they are worked out again when the paths have changed
+        self.pathVersion = pathVersion
+        # CandidateRoutes from a source pair of qubits to every candidate, keyed by the source pair
+        self.routes = dict()
+
+
+class CandidateRoutes:
+    """
+    The swaps needed to get from a source pair of qubits to each edge of a CandidateTable
+    """
+
+    def __init__(self, paths, pathLinks, valid, touched, touchedColumns):
+        # The paths for each candidate (from find_shortest_path) and the same paths as padded arrays of link
+        # indices, one array per source qubit. Padding points at a link with accuracy 1.0
+        self.paths = paths
+        self.pathLinks = pathLinks
+        # False if there is no way for the qubits to get to the candidate
+        self.valid = valid
+        # touched[c, touchedColumns[q]] is True if the swaps to candidate c move physical qubit q. Only the qubits
+        # some path goes through get a column
+        self.touched = touched
+        self.touchedColumns = touchedColumns
+
+
+class RoutingState:
+    """
+    The output DAG of a run and where every qubit currently is. The layout is kept as a pair of integer
+    permutation arrays over the physical qubits so swaps and gates can go straight onto the output DAG, qiskit's
+    Layout is only used for the initial layout.
+
+    It also keeps the predicted success probability of the routed circuit, using the same model as
+    calc_path_accuracy: every swap multiplies it by the accuracy of its link cubed and every two qubit gate by the
+    accuracy of the link it runs on. It is built up as swaps and gates are added, so it costs nothing extra.
+    """
+
+    def __init__(self, new_dag, virtualQubits, herr, linkAccuracy=None, swapAccuracy=None, layout=None, record=False):
+        self.new_dag = new_dag
+        # With record on, nothing is added to new_dag. Instead plan gets a (physical1, physical2) tuple for each swap
+        # and the position of each gate in topological_op_nodes, which HERR.apply_plan can turn back into the routed DAG
+        self.plan = list() if record else None
+        self.nodeIndex = None
+        # Index of each virtual qubit of the input circuit. Any index past the end of the circuit is an unused qubit
+        self.virtualIndex = {qubit: i for i, qubit in enumerate(virtualQubits)}
+        # The wire of new_dag that represents each physical qubit
+        self.wires = list(new_dag.qubits)
+        numPhysical = herr.couplingMap.size()
+        self.numPhysical = numPhysical
+        # The HERR object doing the routing, and the accuracies the success probability is worked out with
+        self.herr = herr
+        self.linkAccuracy = herr.linkAccuracy if linkAccuracy is None else linkAccuracy
+        self.swapAccuracy = herr.swapAccuracy if swapAccuracy is None else swapAccuracy
+        # The HERRPaths.ReliablePaths for those accuracies when they aren't HERR's own (run_sweep's trials), None
+        # means HERR's own paths
+        self.pathEngine = None
+        self.successProbability = 1.0
+        # When HERR has a time budget, the perf_counter time it runs out at, how many seconds it was, and how many two
+        # qubit gates were routed after HERR started cutting back to make it
+        self.deadline = None
+        self.budget = None
+        self.degradedGates = 0
+        if layout is None:
+            layout = list(range(numPhysical))
+        # v2p[virtual] = physical and p2v[physical] = virtual
+        self.v2p = np.array(layout, dtype=np.int32)
+        self.p2v = np.empty(numPhysical, dtype=np.int32)
+        self.p2v[self.v2p] = np.arange(numPhysical, dtype=np.int32)
+
+    def physical_qubits(self, qargs):
+        # Physical qubits the virtual qubits of a gate currently sit on
+        return [int(self.v2p[self.virtualIndex[qubit]]) for qubit in qargs]
+
+    def get_wire(self, physical):
+        # Only circuits smaller than the device need this, we add the rest of the device as ancillas the first
+        # time a swap goes through a physical qubit that has no wire yet
+        if physical >= len(self.wires):
+            # The circuit can have its own register called ancilla, so add a number until the name is free
+            name = 'ancilla'
+            number = 0
+            while name in self.new_dag.qregs:
+                number += 1
+                name = 'ancilla' + str(number)
+            ancilla = QuantumRegister(self.numPhysical - len(self.wires), name)
+            self.new_dag.add_qreg(ancilla)
+            self.wires.extend(ancilla)
+        return self.wires[physical]
+
+    def swap(self, physical1, physical2):
+        # Adds a swap between two physical qubits and updates the layout
+        if self.plan is None:
+            self.new_dag.apply_operation_back(SwapGate(), qargs=[self.get_wire(physical1), self.get_wire(physical2)], cargs=[])
+        else:
+            self.plan.append((physical1, physical2))
+        self.successProbability *= float(self.swapAccuracy[self.herr.edgeIds[physical1, physical2]])
+        virtual1 = self.p2v[physical1]
+        virtual2 = self.p2v[physical2]
+        self.p2v[physical1] = virtual2
+        self.p2v[physical2] = virtual1
+        self.v2p[virtual1] = physical2
+        self.v2p[virtual2] = physical1
+
+    def apply_gate(self, node):
+        # Adds a gate from the input circuit on the physical qubits its qubits are currently on
+        physQArgs = self.physical_qubits(node.qargs)
+        if self.herr.is_two_qubit_gate(node):
+            self.successProbability *= self.gate_accuracy(physQArgs[0], physQArgs[1])
+            if node.op.name == 'swap':
+                # Swaps in the circuit itself are 3 CNOTs too
+                self.successProbability *= self.gate_accuracy(physQArgs[0], physQArgs[1])**2
+        if self.plan is not None:
+            self.plan.append(self.nodeIndex[node])
+            return
+        qargs = [self.get_wire(physical) for physical in physQArgs]
+        self.new_dag.apply_operation_back(node.op, qargs=qargs, cargs=node.cargs)
+
+    def gate_accuracy(self, physical1, physical2):
+        # Predicted accuracy of a two qubit gate on two physical qubits. If they aren't connected the gate still needs
+        # swaps from whatever runs after HERR, so it gets the accuracy of doing it the BasicSwap way
+        edgeId = self.herr.edgeIds.get((physical1, physical2))
+        if edgeId is not None:
+            return float(self.linkAccuracy[edgeId])
+        return float(self.herr.calc_basic_swap_accuracy(physical1, physical2, self.linkAccuracy, self.swapAccuracy,
+                                                        self.pathEngine))
+
+
+# The (HERR object, list of circuits or None) the worker processes of each HERR.imap_run_many call route with, by
+# batch number. A batch is added before its pool starts so forked workers share the parent's copy, and taken out
+# again when it's done, otherwise init_worker adds it once in each worker. Forked workers given a list of circuits
+# share that too, and only get sent the index of each circuit. Each call has its own batch, so two of them running
+# at once don't get each other's circuits
+workerBatches = dict()
+batchNumbers = count()
+
+
+def init_worker(batch, herr):
+    workerBatches[batch] = (herr, None)
+
+
+def route_in_worker(batch, dag):
+    # Sends back the routing plan and success probability instead of the routed DAG since they are a lot cheaper
+    # to pickle
+    return workerBatches[batch][0].route_plan(dag)
+
+
+def route_index_in_worker(batch, index):
+    herr, dags = workerBatches[batch]
+    return herr.route_plan(dags[index])
+
 
 class HERR(TransformationPass):
 
-    def __init__(self, couplingMap, qubitAccuracy, initial_layout=None, searchDepth=2):
+    def __init__(self, couplingMap, qubitAccuracy, initial_layout=None, searchDepth=2, parallelLayers=False,
+                 beamWidth=1, lookahead=0, cache=None, scalable=False, stats=None, profileFile=None, timeBudget=None,
+                 reduceDepthAt=0.75, reliablePaths=True):
         super().__init__()
         # This is the constructor that initalizes all the input values
+        # initial_layout is where the circuit's qubits start: a Layout, or a list with the physical qubit of each
+        # qubit of the circuit. Without one, the layout HERRLayout made for this DAG is used, then the trivial layout
+        # parallelLayers routes all the two qubit gates of a layer together instead of one gate at a time
+        # lookahead > 0 turns on beam search: each gate's swaps are picked by how accurate the next lookahead
+        # two qubit gates are predicted to be, keeping the beamWidth best layouts at each step
+        # cache is an optional HERRCache.RoutingCache that remembers routed circuits, it can be shared between HERR objects
+        # scalable is for big devices (100+ qubits). Nothing is worked out for every pair of qubits up front, instead each
+        # gate only looks at the qubits within searchDepth of it, so the cost follows the neighborhood and not the device.
+        # It routes exactly the same as the default mode
+        # stats is an optional HERRStats.RoutingStats that times each part of run() and counts swaps, candidates and paths.
+        # profileFile is a file name to save cProfile stats of run() to, they can be read with pstats. Both are off by default
+        # timeBudget is the most seconds routing a circuit should take. Once reduceDepthAt of it is used the rest of the
+        # gates are routed with a search depth of 1 and no lookahead, and once it's all used they are routed the BasicSwap
+        # way. The result is always a fully routed circuit, and property_set['herr_degraded_gates'] says how many two qubit
+        # gates were routed after cutting back. None (the default) means no limit
+        # reliablePaths makes the BasicSwap fallback (and the baseline it's compared against) take the most reliable path
+        # between the qubits instead of the one with the fewest swaps. False gives the old hop count paths
         self.couplingMap = couplingMap
         self.qubitAccuracy = qubitAccuracy
         self.initial_layout = initial_layout
         self.searchDepth = searchDepth
+        self.parallelLayers = parallelLayers
+        self.beamWidth = beamWidth
+        self.lookahead = lookahead
+        self.cache = cache
+        self.scalable = scalable
+        self.stats = stats
+        self.profileFile = profileFile
+        self.timeBudget = timeBudget
+        self.reduceDepthAt = reduceDepthAt
+        self.reliablePaths = reliablePaths
+        if timeBudget is not None and (timeBudget < 0 or not 0 <= reduceDepthAt <= 1):
+            raise TranspilerError("timeBudget can't be negative and reduceDepthAt has to be between 0 and 1")
+        if beamWidth < 1 or lookahead < 0:
+            raise TranspilerError("beamWidth has to be at least 1 and lookahead can't be negative")
+        if parallelLayers and lookahead > 0:
+            raise TranspilerError("lookahead is only supported when routing one gate at a time")
+
+        # The candidate edges for a gate only depend on the coupling map and the search depth, so we
+        # work them out once here instead of scanning every edge for every gate in run()
+        # In scalable mode they are found from the neighborhoods of each pair the first time it's routed instead
+        self.uniqueEdges = self.find_unique_edges()
+        self.edgeIds = dict()
+        for edgeId, edge in enumerate(self.uniqueEdges):
+            self.edgeIds[edge] = edgeId
+            self.edgeIds[(edge[1], edge[0])] = edgeId
+        self.neighborStart, self.neighborQubits, self.neighborEdges = self.build_neighbor_arrays()
+        self.neighborhoods = dict()
+        self.candidateEdges = None if scalable else self.build_candidate_index(self.searchDepth)
+
+        # Accuracy of each unique edge, indexed the same way as uniqueEdges. The extra 1.0 on the end is
+        # what the padding in the candidate tables points at. swapAccuracy is cubed since a swap is 3 CNOTs
+        self.linkAccuracy, self.swapAccuracy = self.build_accuracy_arrays()
+        # The BasicSwap path between pairs of physical qubits, filled in as routing asks for them. With reliablePaths
+        # they come from pathEngine, a HERRPaths.ReliablePaths made the first time a path is needed. pathVersion goes
+        # up every time the paths are thrown out, so candidate tables know their baseline is out of date
+        self.basicPaths = dict()
+        self.pathEngine = None
+        self.pathVersion = 0
+        self.candidateTables = dict()
+        # The moves beam search considers for a gate on a pair of physical qubits, and for each link the pairs
+        # whose moves were worked out using that link's accuracy
+        self.routeOptions = dict()
+        self.optionLinks = dict()
+
+        # Paths found on the coupling graph with one qubit removed, filled in as routing asks for them
+        self.excludedPaths = dict()
 
     def run(self, dag):
         # The run function is be be called to run routing. The input is the DAG of the circuit being test,
         # output is dag representing routed circuit
+        # The predicted success probability of the routed circuit is put in property_set['herr_success_probability']
+        if self.stats is None and self.profileFile is None:
+            return self.run_cached(dag)
+
+        if self.profileFile is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            if self.stats is not None:
+                new_dag = self.stats.record(self, self.run_cached, dag)
+                self.property_set['herr_stats'] = self.stats.as_dict()
+            else:
+                new_dag = self.run_cached(dag)
+        finally:
+            if self.profileFile is not None:
+                profiler.disable()
+                profiler.dump_stats(self.profileFile)
+        return new_dag
+
+    def run_cached(self, dag):
+        # Routes the circuit, using the routing cache if there is one
+        entry = None
+        if self.cache is not None:
+            key = self.cache.make_key(dag, self)
+            entry = self.cache.get(key)
+        if entry is None:
+            state = self.new_routing_state(dag)
+            self.route_state(dag, state)
+            new_dag, successProbability = state.new_dag, state.successProbability
+            degradedGates = state.degradedGates
+            # A circuit that was cut short by the time budget isn't what HERR would normally give, so it isn't cached
+            if self.cache is not None and degradedGates == 0:
+                self.cache.put(key, new_dag, successProbability)
+        else:
+            new_dag, successProbability = entry
+            degradedGates = 0
+        self.property_set['herr_success_probability'] = successProbability
+        self.property_set['herr_degraded_gates'] = degradedGates
+        return new_dag
+
+    def routing_options(self):
+        # The settings that change how a circuit gets routed, used as part of the routing cache key
+        return (self.searchDepth, self.parallelLayers, self.beamWidth, self.lookahead, self.reliablePaths)
+
+    def route(self, dag):
+        # Routes the circuit, without looking in the cache
+        return self.route_with_probability(dag)[0]
+
+    def route_with_probability(self, dag):
+        # Routes the circuit and returns it along with its predicted success probability
+        state = self.new_routing_state(dag)
+        self.route_state(dag, state)
+        return state.new_dag, state.successProbability
+
+    def route_plan(self, dag):
+        # Routes the circuit but only records the plan (see RoutingState) instead of building the routed DAG. Returns
+        # the plan and the predicted success probability
+        state = self.new_routing_state(dag, record=True)
+        self.route_state(dag, state)
+        return state.plan, state.successProbability
+
+    def apply_plan(self, dag, plan):
+        # Builds the routed DAG from a plan made by route_plan for the same dag. route_plan already worked out the
+        # success probability, so this only puts the gates on their wires, keeping the layout in plain lists
+        state = self.new_routing_state(dag)
+        nodes = list(dag.topological_op_nodes())
+        virtualIndex = state.virtualIndex
+        v2p = state.v2p.tolist()
+        p2v = state.p2v.tolist()
+        for step in plan:
+            if isinstance(step, tuple):
+                physical1, physical2 = step
+                state.new_dag.apply_operation_back(SwapGate(), qargs=[state.get_wire(physical1), state.get_wire(physical2)], cargs=[])
+                virtual1 = p2v[physical1]
+                virtual2 = p2v[physical2]
+                p2v[physical1] = virtual2
+                p2v[physical2] = virtual1
+                v2p[virtual1] = physical2
+                v2p[virtual2] = physical1
+            else:
+                node = nodes[step]
+                qargs = [state.get_wire(v2p[virtualIndex[qubit]]) for qubit in node.qargs]
+                state.new_dag.apply_operation_back(node.op, qargs=qargs, cargs=node.cargs)
+        return state.new_dag
+
+    def route_template(self, dag):
+        """
+        Routes a circuit with unbound parameters and returns a HERRTemplate.RoutingTemplate. Binding values to the
+        template gives the same circuit as binding them first and routing, without routing again
+
+        Args:
+            dag: DAG of the circuit, its gates can have Parameters in them
+        """
+        new_dag, successProbability = self.route_with_probability(dag)
+        return HERRTemplate.RoutingTemplate(new_dag, successProbability)
+
+    def route_state(self, dag, state):
+        # Routes dag into a RoutingState
+        # Basically: 1) iterate through each gate
+        # 2) Grab arugment qubits for a gate
+        # 3) Use search function to see if better edge exists
+        # 4) If so, add swaps. If not, default to BasicSwap
+        if self.timeBudget is not None:
+            state.deadline = time.perf_counter() + self.timeBudget
+            state.budget = self.timeBudget
+        if self.parallelLayers:
+            self.route_layers(dag, state)
+        elif self.lookahead > 0:
+            nodes = list(dag.topological_op_nodes())
+            twoQubitGates = [node for node in nodes if self.is_two_qubit_gate(node)]
+            gateIndex = 0
+            for node in nodes:
+                if self.is_two_qubit_gate(node):
+                    gateIndex += 1
+                    depth, degraded = self.budget_depth(state)
+                    if degraded:
+                        self.route_gate(state, state.physical_qubits(node.qargs), depth=depth)
+                    else:
+                        upcoming = [[state.virtualIndex[qubit] for qubit in gate.qargs]
+                                    for gate in twoQubitGates[gateIndex:gateIndex + self.lookahead]]
+                        self.route_gate_lookahead(state, state.physical_qubits(node.qargs), upcoming)
+                state.apply_gate(node)
+        else:
+            for node in dag.topological_op_nodes():
+                if self.is_two_qubit_gate(node):
+                    self.route_gate(state, state.physical_qubits(node.qargs))
+                state.apply_gate(node)
+
+    def new_routing_state(self, dag, record=False, linkAccuracy=None, swapAccuracy=None):
+        # Makes an empty output DAG with the same registers as dag, and the RoutingState that fills it in
         new_dag = DAGCircuit()
         for qreg in dag.qregs.values():
             new_dag.add_qreg(qreg)
         for creg in dag.cregs.values():
             new_dag.add_creg(creg)
+        new_dag.global_phase = dag.global_phase
 
         if len(dag.qubits) > len(self.couplingMap.physical_qubits):
             raise TranspilerError("The layout does not match the amount of qubits in the DAG")
-        
-        # Sets up inputs
-        canonical_register = dag.qregs['q']
-        trivial_layout = Layout.generate_trivial_layout(canonical_register)
-        current_layout = trivial_layout.copy()
-        
-        # Basically: 1) iterate through each layer
-        # 2) Grab arugment qubits for a gate
-        # 3) Use search function to see if better edge exists
-        # 4) If so, add swaps. If not, default to BasicSwap
-        for layer in dag.serial_layers():
-            subdag = layer['graph']
-            for gate in subdag.two_qubit_ops():
-                physQArgs = [current_layout[gate.qargs[0]], current_layout[gate.qargs[1]]]
-                # If the two qubits are not attached at the coupling map add swap to connect
-                betterEdge = self.find_better_link(physQArgs[0], physQArgs[1], current_layout, self.searchDepth)
-                if betterEdge is not None:
-                    # Lets insert swap to go to the better edge
-                    swap_layer = DAGCircuit()
-                    swap_layer.add_qreg(canonical_register)
-
-                    # Find shortest path returns the path of qubits to insert swap gates at
-                    swapPath = self.find_shortest_path((physQArgs[0], physQArgs[1]), (betterEdge[0], betterEdge[1]))
-                    for i in range(2):
-                        if swapPath[i] is not None:
-                            for swap in range(0, len(swapPath[i])-1, 1):
-                                    connected_wire_1 = swapPath[i][swap]
-                                    connected_wire_2 = swapPath[i][swap + 1]
-
-                                    qubit_1 = current_layout[connected_wire_1]
-                                    qubit_2 = current_layout[connected_wire_2]
-
-                                    swap_layer.apply_operation_back(SwapGate(),
-                                                                        qargs=[qubit_1, qubit_2],
-                                                                        cargs=[])
-
-                    # layer insertion
-                    order = current_layout.reorder_bits(new_dag.qubits)
-                    new_dag.compose(swap_layer, qubits=order)
-
-                    # update current_layout
-                    for i in range(2):
-                        if swapPath[i] is not None:
-                            for swap in range(0, len(swapPath[i])-1, 1):
-                                current_layout.swap(swapPath[i][swap], swapPath[i][swap + 1])  
+
+        state = RoutingState(new_dag, dag.qubits, self, linkAccuracy, swapAccuracy, self.get_initial_layout(dag), record)
+        if record:
+            state.nodeIndex = {node: index for index, node in enumerate(dag.topological_op_nodes())}
+        return state
+
+    def get_initial_layout(self, dag):
+        """
+        Returns the physical qubit every qubit starts on, as a list over all the physical qubits. The first
+        len(dag.qubits) entries are the circuit's qubits, the rest are the unused physical qubits in order
+        """
+        layout = self.initial_layout
+        if layout is None:
+            layout = self.find_pass_layout(dag)
+        if layout is None:
+            return list(range(self.couplingMap.size()))
+
+        if isinstance(layout, Layout):
+            if any(qubit not in layout for qubit in dag.qubits):
+                raise TranspilerError("The initial layout does not have every qubit of the DAG")
+            placement = [layout[qubit] for qubit in dag.qubits]
+        else:
+            placement = list(layout)
+        if (len(placement) != len(dag.qubits) or len(set(placement)) != len(placement)
+                or any(physical not in range(self.couplingMap.size()) for physical in placement)):
+            raise TranspilerError("The initial layout does not match the qubits in the DAG and the coupling map")
+        used = set(placement)
+        return placement + [physical for physical in range(self.couplingMap.size()) if physical not in used]
+
+    def find_pass_layout(self, dag):
+        # The layout HERRLayout left in the property set, if it was made for this DAG. Layouts from other passes are
+        # left alone: in a normal pipeline ApplyLayout has already put the DAG on physical qubits, so using the layout
+        # again would move the qubits twice
+        layout = self.property_set['herr_layout']
+        if layout is None or self.property_set['original_qubit_indices'] is not None:
+            return None
+        if any(qubit not in layout for qubit in dag.qubits):
+            return None
+        return layout
+
+    def run_sweep(self, dag, accuracies):
+        """
+        Routes one circuit against many noise graphs at once. Everything about the coupling map is shared, and in
+        the default mode the better edge search for a gate is done for all the noise graphs together with array
+        operations, grouping the trials where the gate is on the same physical qubits. Each result is the same
+        circuit run() would give for that noise graph. The predicted success probability of each one is put in
+        property_set['herr_success_probabilities'].
+        With a time budget the sweep gets timeBudget for each trial, the same time routing them one at a time would
+        have. In the default mode the trials are routed together, so they share it and all start cutting back once
+        reduceDepthAt of the whole sweep's time is used. How many gates of each trial were routed after cutting back
+        is put in property_set['herr_degraded_gates_per_trial'].
+
+        Args:
+            dag: DAG of the circuit to route
+            accuracies: (N, number of edges) array. Row n has the accuracy of each edge of trial n, in the
+                order of self.uniqueEdges
+
+        Returns:
+            List of the N routed DAGs
+        """
+        accuracies = np.asarray(accuracies, dtype=float)
+        if accuracies.ndim != 2 or accuracies.shape[1] != len(self.uniqueEdges):
+            raise TranspilerError("accuracies needs one row per trial and one column per edge in uniqueEdges")
+        linkAccuracy, swapAccuracy = self.stack_accuracy_arrays(accuracies)
+
+        if self.parallelLayers or self.lookahead > 0:
+            # These modes keep per gate state that doesn't vectorize, so route each trial on its own instead. They
+            # still share the candidate tables and paths, only the accuracies (and anything worked out from them) are
+            # swapped in and out
+            saved = (self.linkAccuracy, self.swapAccuracy, self.routeOptions, self.optionLinks)
+            states = list()
+            try:
+                for trial in range(len(accuracies)):
+                    self.use_accuracy_arrays(linkAccuracy[trial], swapAccuracy[trial])
+                    state = self.new_routing_state(dag)
+                    self.route_state(dag, state)
+                    states.append(state)
+            finally:
+                self.use_accuracy_arrays(saved[0], saved[1])
+                self.routeOptions, self.optionLinks = saved[2], saved[3]
+            self.property_set['herr_success_probabilities'] = [state.successProbability for state in states]
+            self.property_set['herr_degraded_gates_per_trial'] = [state.degradedGates for state in states]
+            return [state.new_dag for state in states]
+
+        states = [self.new_routing_state(dag, linkAccuracy=linkAccuracy[trial], swapAccuracy=swapAccuracy[trial])
+                  for trial in range(len(accuracies))]
+        if self.timeBudget is not None:
+            deadline = time.perf_counter() + self.timeBudget * len(states)
+            for state in states:
+                state.deadline = deadline
+                state.budget = self.timeBudget * len(states)
+        if self.reliablePaths:
+            # The most reliable paths depend on the noise, so every trial finds its own
+            for trial, state in enumerate(states):
+                state.pathEngine = self.make_path_engine(linkAccuracy[trial])
+        for node in dag.topological_op_nodes():
+            if self.is_two_qubit_gate(node):
+                # Trials that have the gate on the same qubits, and the same search depth left in the time budget, get
+                # their better edges worked out together
+                samePair = dict()
+                for trial, state in enumerate(states):
+                    depth = self.budget_depth(state)[0]
+                    samePair.setdefault((tuple(state.physical_qubits(node.qargs)), depth), []).append(trial)
+                for (physQArgs, depth), trials in samePair.items():
+                    betterEdges = [None] * len(trials)
+                    if depth > 0:
+                        pathEngines = [states[trial].pathEngine for trial in trials] if self.reliablePaths else None
+                        betterEdges = self.find_better_links(physQArgs[0], physQArgs[1], depth,
+                                                             linkAccuracy[trials], swapAccuracy[trials],
+                                                             pathEngines=pathEngines)
+                    for trial, betterEdge in zip(trials, betterEdges):
+                        for swap in self.find_route_swaps(physQArgs, betterEdge, states[trial].pathEngine):
+                            states[trial].swap(swap[0], swap[1])
+            for state in states:
+                state.apply_gate(node)
+        self.property_set['herr_success_probabilities'] = [state.successProbability for state in states]
+        self.property_set['herr_degraded_gates_per_trial'] = [state.degradedGates for state in states]
+        return [state.new_dag for state in states]
+
+    def run_many(self, dags, workers=None, chunksize=1):
+        """
+        Routes a list of circuits on a pool of worker processes and returns the routed DAGs in the same order.
+        See imap_run_many
+        """
+        self.property_set['herr_success_probabilities'] = list()
+        return list(self.imap_run_many(dags, workers, chunksize))
+
+    def imap_run_many(self, dags, workers=None, chunksize=1):
+        """
+        Streaming version of run_many, yields each routed DAG in order as soon as it is done. With the default fork
+        start method the workers share this process's memory, so only the circuits themselves get pickled, and when
+        dags is a list the candidate tables for the pairs its circuits start on are built by prepare() before the pool
+        starts so the workers share those too. The workers send back routing plans and success probabilities, and
+        the plans get turned into DAGs here. Building a DAG is most of the work of routing a circuit once the
+        candidate tables are built, and that part runs in this process one circuit at a time, so with warm tables this
+        is rarely more than about 1.5 times faster than routing in this process however many workers there are. It
+        helps most with deep searches (searchDepth, lookahead) and with tables that aren't built yet.
+        The routing cache is not used.
+        The predicted success probability of each circuit is added to property_set['herr_success_probabilities'].
+
+        Args:
+            dags: Iterable of DAGs to route
+            workers: Number of worker processes, defaults to the number of CPUs. 1 routes in this process
+            chunksize: How many circuits to send to a worker at a time
+        """
+        successProbabilities = self.property_set.setdefault('herr_success_probabilities', list())
+        if workers == 1:
+            for dag in dags:
+                new_dag, successProbability = self.route_with_probability(dag)
+                successProbabilities.append(successProbability)
+                yield new_dag
+            return
+
+        context = multiprocessing.get_context()
+        batch = next(batchNumbers)
+        # The workers get a list when they fork, so they only need to be told which circuit to route
+        indexed = context.get_start_method() == 'fork' and isinstance(dags, (list, tuple))
+        try:
+            if context.get_start_method() == 'fork':
+                if indexed:
+                    self.prepare(self.find_start_pairs(dags))
+                workerBatches[batch] = (self, dags if indexed else None)
+                # Freezing stops the workers' garbage collector from walking (and so copying) everything they inherit
+                gc.freeze()
+                try:
+                    pool = context.Pool(workers)
+                finally:
+                    gc.unfreeze()
+            else:
+                pool = context.Pool(workers, initializer=init_worker, initargs=(batch, self))
+
+            if indexed:
+                tasks = range(len(dags))
+                routeTask = partial(route_index_in_worker, batch)
+            else:
+                # imap hands the circuits to the workers as it goes, so keep our own copy of each one to apply its
+                # plan to, until it has been
+                sent = deque()
+
+                def send():
+                    for dag in dags:
+                        sent.append(dag)
+                        yield dag
+                tasks = send()
+                routeTask = partial(route_in_worker, batch)
+
+            with pool:
+                for index, (plan, successProbability) in enumerate(pool.imap(routeTask, tasks, chunksize)):
+                    dag = dags[index] if indexed else sent.popleft()
+                    successProbabilities.append(successProbability)
+                    yield self.apply_plan(dag, plan)
+        finally:
+            workerBatches.pop(batch, None)
+
+    def prepare(self, pairs=None):
+        """
+        Builds the candidate tables, and the routes from each pair of qubits to its candidates, for pairs of physical
+        qubits. Routing does this bit by bit as it needs them, this just gets it done up front.
+        In scalable mode this does nothing, since building something for every pair is what that mode avoids
+
+        Args:
+            pairs: The (qubit1, qubit2) pairs to build them for, every pair of physical qubits if None
+        """
+        if self.scalable:
+            return
+        if pairs is None:
+            pairs = [(qubit1, qubit2) for qubit1 in range(self.couplingMap.size())
+                     for qubit2 in range(self.couplingMap.size()) if qubit1 != qubit2]
+        for qubit1, qubit2 in pairs:
+            table = self.get_candidate_table(qubit1, qubit2, self.searchDepth)
+            self.get_candidate_routes(table, (qubit1, qubit2))
+
+    def find_start_pairs(self, dags):
+        # The physical qubits of every two qubit gate of the circuits on their initial layout. Routing a gate starts
+        # from the pair it's on, so these are the pairs worth preparing before a batch without doing the whole device
+        pairs = set()
+        for dag in dags:
+            layout = self.get_initial_layout(dag)
+            virtualIndex = {qubit: i for i, qubit in enumerate(dag.qubits)}
+            for node in dag.op_nodes():
+                if self.is_two_qubit_gate(node):
+                    pairs.add((layout[virtualIndex[node.qargs[0]]], layout[virtualIndex[node.qargs[1]]]))
+        return sorted(pairs)
+
+    def stack_accuracy_arrays(self, accuracies):
+        # linkAccuracy and swapAccuracy for a stack of trials, one row per trial, with the 1.0 padding column on the end
+        linkAccuracy = np.ones((len(accuracies), len(self.uniqueEdges) + 1))
+        linkAccuracy[:, :-1] = accuracies
+        # Cubed with python floats so it matches build_accuracy_arrays exactly
+        swapAccuracy = np.array([[weight**3 for weight in row] for row in linkAccuracy.tolist()]).reshape(linkAccuracy.shape)
+        return linkAccuracy, swapAccuracy
+
+    def route_layers(self, dag, state):
+        """
+        Routes the circuit a layer at a time. The two qubit gates in a layer don't depend on each other, so while
+        routing one of them we stay away from the qubits the rest of the layer is using. That way the swaps for
+        different gates end up on different qubits and run at the same time instead of one after another.
+        """
+        # multigraph_layers gives a layer's gates in node id order, which changes when the DAG gets pickled (like the
+        # copies run_many's workers get), so they are put in topological order to route the same way on any copy
+        order = {node: index for index, node in enumerate(dag.topological_op_nodes())}
+        for layer in dag.multigraph_layers():
+            twoQubitGates = list()
+            for node in sorted((node for node in layer if isinstance(node, DAGOpNode)), key=order.get):
+                if self.is_two_qubit_gate(node):
+                    twoQubitGates.append(node)
                 else:
-                    if self.couplingMap.distance(physQArgs[0], physQArgs[1]) != 1:
-                        # If we can perform no noise based swaps, make sure the qubits are connecting in the coupling map
-                        # This routing algorithm is taken form the basic_swap.py module in Qiskit terra
-                        # Insert a new layer with the SWAP(s).
-                        swap_layer = DAGCircuit()
-                        swap_layer.add_qreg(canonical_register)
-
-                        path = self.couplingMap.shortest_undirected_path(physQArgs[0], physQArgs[1])
-                        for swap in range(len(path) - 2):
-                            connected_wire_1 = path[swap]
-                            connected_wire_2 = path[swap + 1]
-
-                            qubit_1 = current_layout[connected_wire_1]
-                            qubit_2 = current_layout[connected_wire_2]
-
-                            # create the swap operation
-                            swap_layer.apply_operation_back(
-                                SwapGate(), qargs=[qubit_1, qubit_2], cargs=[]
-                            )
-
-                        # layer insertion
-                        order = current_layout.reorder_bits(new_dag.qubits)
-                        new_dag.compose(swap_layer, qubits=order)
-
-                        # update current_layout
-                        for swap in range(len(path) - 2):
-                            current_layout.swap(path[swap], path[swap + 1])       
-
-                            
-            order = current_layout.reorder_bits(new_dag.qubits)
-            new_dag.compose(subdag, qubits=order)
+                    # Nothing else in the layer touches these qubits, so they can go on before any swaps
+                    state.apply_gate(node)
 
-        return new_dag
+            # Qubits that swaps or gates of this layer have already used
+            busyQubits = set()
+            for index, node in enumerate(twoQubitGates):
+                physQArgs = state.physical_qubits(node.qargs)
+                avoidQubits = set(busyQubits)
+                for otherNode in twoQubitGates[index+1:]:
+                    avoidQubits.update(state.physical_qubits(otherNode.qargs))
+                avoidQubits.difference_update(physQArgs)
+
+                for swap in self.route_gate(state, physQArgs, avoidQubits):
+                    busyQubits.update(swap)
+                busyQubits.update(state.physical_qubits(node.qargs))
+                state.apply_gate(node)
+
+    def route_gate(self, state, physQArgs, avoidQubits=None, depth=None):
+        """
+        Adds the swaps needed before a gate on physical qubits physQArgs and returns them as a list of pairs
+
+        Args:
+            state: RoutingState of the run
+            physQArgs: Physical qubits the gate is on right now
+            avoidQubits: Physical qubits the better edge search should not move, if any
+            depth: Search depth to use, from budget_depth if not given. 0 skips the search and uses BasicSwap
+        """
+        if depth is None:
+            depth = self.budget_depth(state)[0]
+        # If the two qubits are not attached at the coupling map add swap to connect
+        betterEdge = None
+        if depth > 0:
+            betterEdge = self.find_better_link(physQArgs[0], physQArgs[1], state, depth, avoidQubits)
+        swaps = self.find_route_swaps(physQArgs, betterEdge)
+        for swap in swaps:
+            state.swap(swap[0], swap[1])
+        return swaps
 
-    def find_better_link(self, qubit1, qubit2, currentLayout, depth):
+    def budget_depth(self, state):
+        """
+        Returns (search depth, degraded) for the next gate of a run with a time budget. It's searchDepth until
+        reduceDepthAt of the budget is used, 1 after that and 0 (BasicSwap) once the budget is gone. degraded is True
+        for the last two, and those gates are counted in state.degradedGates
+        """
+        if state.deadline is None:
+            return self.searchDepth, False
+        timeLeft = state.deadline - time.perf_counter()
+        if timeLeft > (1 - self.reduceDepthAt) * state.budget:
+            return self.searchDepth, False
+        state.degradedGates += 1
+        if timeLeft > 0:
+            return 1, True
+        return 0, True
+
+    def find_route_swaps(self, physQArgs, betterEdge, pathEngine=None):
+        """
+        Returns the swaps that move a gate on physQArgs to betterEdge, or that connect its qubits the BasicSwap
+        way if there is no better edge
+
+        Args:
+            physQArgs: Physical qubits the gate is on right now
+            betterEdge: Edge from find_better_link, or None
+            pathEngine: ReliablePaths to take the BasicSwap path from instead of HERR's own (see get_basic_path)
+        """
+        swaps = list()
+        if betterEdge is not None:
+            # Lets insert swap to go to the better edge
+            # Find shortest path returns the path of qubits to insert swap gates at
+            swapPath = self.find_shortest_path((physQArgs[0], physQArgs[1]), (betterEdge[0], betterEdge[1]))
+            for i in range(2):
+                if swapPath[i] is not None:
+                    for swap in range(0, len(swapPath[i])-1, 1):
+                        swaps.append((swapPath[i][swap], swapPath[i][swap + 1]))
+        elif (physQArgs[0], physQArgs[1]) not in self.edgeIds:
+            # If we can perform no noise based swaps, make sure the qubits are connecting in the coupling map
+            # This routing algorithm is taken form the basic_swap.py module in Qiskit terra
+            path = self.get_basic_path(physQArgs[0], physQArgs[1], pathEngine)
+            for swap in range(len(path) - 2):
+                swaps.append((path[swap], path[swap + 1]))
+        return swaps
+
+    def route_gate_lookahead(self, state, physQArgs, upcoming):
+        """
+        Beam search version of route_gate. Every move for this gate is tried, then the next gates in upcoming are
+        routed on the simulated layouts, keeping only the beamWidth most accurate layouts after each gate. The
+        move that leads to the best layout at the end gets added. Each step looks at no more than
+        beamWidth*(beamWidth + 2) moves, so the cost per gate is bounded by the lookahead and beam width.
+
+        Args:
+            state: RoutingState of the run
+            physQArgs: Physical qubits the gate is on right now
+            upcoming: The virtual qubit indices of the next two qubit gates
+        """
+        # Each entry is (log of predicted accuracy, the first move, v2p, p2v)
+        beam = list()
+        for move in self.find_route_options(physQArgs[0], physQArgs[1]):
+            v2p, p2v = self.simulate_swaps(state.v2p, state.p2v, move[0])
+            beam.append((move[1], move, v2p, p2v))
+        beam = sorted(beam, key=lambda entry: entry[0], reverse=True)[:self.beamWidth]
+
+        for gate in upcoming:
+            nextBeam = list()
+            for logAccuracy, firstMove, v2p, p2v in beam:
+                for move in self.find_route_options(int(v2p[gate[0]]), int(v2p[gate[1]])):
+                    newV2p, newP2v = self.simulate_swaps(v2p, p2v, move[0])
+                    nextBeam.append((logAccuracy + move[1], firstMove, newV2p, newP2v))
+            # sorted is stable so on a tie the greedy move, which is always listed first, wins
+            beam = sorted(nextBeam, key=lambda entry: entry[0], reverse=True)[:self.beamWidth]
+
+        swaps = beam[0][1][0]
+        for swap in swaps:
+            state.swap(swap[0], swap[1])
+        return list(swaps)
+
+    def find_route_options(self, qubit1, qubit2):
+        """
+        Returns the moves beam search tries for a gate on physical qubits (qubit1, qubit2), as a list of
+        (swaps, log of predicted accuracy). The predicted accuracy uses the calc_path_accuracy model: the accuracy
+        of the link the gate ends up on times the accuracy of each swap cubed. The moves are whatever find_better_link
+        picks, the BasicSwap move, and the beamWidth best candidate edges. They only depend on the pair, so are cached.
+        """
+        key = (qubit1, qubit2)
+        if key in self.routeOptions:
+            return self.routeOptions[key]
+
+        table = self.get_candidate_table(qubit1, qubit2, self.searchDepth)
+        routes = self.get_candidate_routes(table, (qubit1, qubit2))
+        candidateAccuracy = self.score_candidates(table, (qubit1, qubit2))
+
+        choices = list()
+        betterEdge = self.find_better_link(qubit1, qubit2, None, self.searchDepth)
+        if betterEdge is not None:
+            choices.append(table.edges.index(betterEdge))
+        choices.append(None)
+        for c in np.argsort(-candidateAccuracy, kind='stable')[:self.beamWidth]:
+            if routes.valid[c] and int(c) not in choices:
+                choices.append(int(c))
+
+        options = list()
+        for c in choices:
+            swaps = list()
+            if c is None:
+                # The BasicSwap move, down the shortest path until the qubits are next to each other
+                accuracy = self.calc_basic_swap_accuracy(qubit1, qubit2)
+                if table.baselineEdge is None:
+                    path = self.get_basic_path(qubit1, qubit2)
+                    for swap in range(len(path) - 2):
+                        swaps.append((path[swap], path[swap + 1]))
+            else:
+                for i in range(2):
+                    if routes.paths[c][i] is not None:
+                        for swap in range(0, len(routes.paths[c][i])-1, 1):
+                            swaps.append((routes.paths[c][i][swap], routes.paths[c][i][swap + 1]))
+                accuracy = candidateAccuracy[c]
+            logAccuracy = np.log(accuracy) if accuracy > 0 else -np.inf
+            options.append((tuple(swaps), logAccuracy))
+
+        self.routeOptions[key] = options
+
+        # Remember which accuracies went into these moves so update_accuracy knows when to throw them out
+        usedLinks = set(table.edgeIds.tolist()) | set(table.baselineLinks)
+        if table.baselineEdge is not None:
+            usedLinks.add(table.baselineEdge)
+        for sourceRoutes in table.routes.values():
+            for i in range(2):
+                usedLinks.update(sourceRoutes.pathLinks[i].ravel().tolist())
+        usedLinks.discard(len(self.uniqueEdges))
+        for option in options:
+            for swap in option[0]:
+                usedLinks.add(self.edgeIds[swap])
+        if table.baselineEdge is None:
+            path = self.get_basic_path(qubit1, qubit2)
+            usedLinks.add(self.edgeIds[path[-2], path[-1]])
+        for link in usedLinks:
+            self.optionLinks.setdefault(link, set()).add(key)
+        return options
+
+    def simulate_swaps(self, v2p, p2v, swaps):
+        # Copy of a layout with some swaps done on it, for trying out moves without touching the output DAG
+        v2p = v2p.copy()
+        p2v = p2v.copy()
+        for physical1, physical2 in swaps:
+            virtual1 = p2v[physical1]
+            virtual2 = p2v[physical2]
+            p2v[physical1] = virtual2
+            p2v[physical2] = virtual1
+            v2p[virtual1] = physical2
+            v2p[virtual2] = physical1
+        return v2p, p2v
+
+    def is_two_qubit_gate(self, node):
+        # The gates HERR routes. Directives like barriers are ignored, the same as DAGCircuit.two_qubit_ops
+        return len(node.qargs) == 2 and not getattr(node.op, "_directive", False)
+
+    def find_better_link(self, qubit1, qubit2, currentLayout, depth, avoidQubits=None):
         """
         Given two qubits that will be used, it finds are more ideal pair given the
         coupling map
@@ -120,61 +851,435 @@ class HERR(TransformationPass):
         Args:
             qubit1: First physical qubit being used in gate
             qubit2: Second physical qubit being used in gate
+            avoidQubits: Physical qubits the swaps to the new pair are not allowed to touch
         """
         
-        # Gather a list of the edges
-        # Annoyingly, the get_edges functions will return 2 times the number of edges
-        # ie, it returns [0,1] and [1,0] as two different edges. This confuses the algorithm
-        # so we basically remove duplicates by sorting then adding to a set.
-        edges = self.couplingMap.get_edges()
+        return self.find_better_links(qubit1, qubit2, depth, self.linkAccuracy[np.newaxis], self.swapAccuracy[np.newaxis],
+                                      avoidQubits)[0]
+
+    def find_better_links(self, qubit1, qubit2, depth, linkAccuracy, swapAccuracy, avoidQubits=None, pathEngines=None):
+        """
+        find_better_link for a stack of noise graphs at once. Returns a list with the better edge (or None)
+        for each row of the accuracy arrays
+
+        Args:
+            qubit1: First physical qubit being used in gate
+            qubit2: Second physical qubit being used in gate
+            depth: How far away from the qubits to look
+            linkAccuracy: Link accuracies, one row per noise graph (see stack_accuracy_arrays)
+            swapAccuracy: Cubed link accuracies, one row per noise graph
+            avoidQubits: Physical qubits the swaps to the new pair are not allowed to touch
+            pathEngines: The ReliablePaths of each row, when each noise graph has its own BasicSwap path. By default
+                every row is compared against HERR's own
+        """
+        table = self.get_candidate_table(qubit1, qubit2, depth)
+        if pathEngines is None or table.baselineEdge is not None:
+            bestEdgeAccuracy = self.calc_baseline_accuracy(table, linkAccuracy, swapAccuracy)
+        else:
+            bestEdgeAccuracy = np.array([
+                self.calc_baseline_accuracy(table, linkAccuracy[row], swapAccuracy[row],
+                                            self.find_baseline_links(qubit1, qubit2, pathEngine))
+                for row, pathEngine in enumerate(pathEngines)])
+
+        blocked = None
+        if avoidQubits:
+            routes = self.get_candidate_routes(table, (qubit1, qubit2))
+            columns = [routes.touchedColumns[qubit] for qubit in avoidQubits if qubit in routes.touchedColumns]
+            blocked = routes.touched[:, columns].any(axis=1)
+
+        numTrials = len(linkAccuracy)
+        bestEdges = [None] * numTrials
+        sources = [(qubit1, qubit2)] * numTrials
+        start = np.zeros(numTrials, dtype=int)
+        columns = np.arange(len(table.edges))
+        # Each candidate is scored by the paths from the best edge found so far. So score all the remaining candidates
+        # at once from the current best edge, jump to the first one that beats it, and repeat until none do.
+        # Trials that are on the same best edge are scored together
+        active = list(range(numTrials)) if len(table.edges) > 0 else []
+        while len(active) > 0:
+            sameSource = dict()
+            for trial in active:
+                sameSource.setdefault(sources[trial], []).append(trial)
+            active = list()
+            for source, trials in sameSource.items():
+                candidateAccuracy = self.score_candidates(table, source, linkAccuracy[trials], swapAccuracy[trials])
+                if blocked is not None:
+                    candidateAccuracy[:, blocked] = 0
+                better = (candidateAccuracy > bestEdgeAccuracy[trials, np.newaxis]) & (columns >= start[trials, np.newaxis])
+                found = better.any(axis=1)
+                first = better.argmax(axis=1)
+                for row, trial in enumerate(trials):
+                    if found[row]:
+                        bestEdgeAccuracy[trial] = candidateAccuracy[row, first[row]]
+                        bestEdges[trial] = table.edges[first[row]]
+                        sources[trial] = bestEdges[trial]
+                        start[trial] = first[row] + 1
+                        active.append(trial)
+        return bestEdges
+
+    def find_unique_edges(self):
+        """
+        Annoyingly, the get_edges functions will return 2 times the number of edges
+        ie, it returns [0,1] and [1,0] as two different edges. This confuses the algorithm
+        so we basically remove duplicates by sorting then adding to a set.
+        """
         uniqueEdges = set()
-        for edge in edges:
+        for edge in self.couplingMap.get_edges():
             uniqueEdges.add(tuple(sorted(edge)))
-        if [qubit1, qubit2] in self.qubitAccuracy.edges():
-            bestEdgeAccuracy =  self.qubitAccuracy.edges[qubit1, qubit2]['weight']
-        else:
-            bestEdgeAccuracy = self.calc_shortest_path_accuracy(qubit1, qubit2)
-
-        bestEdge = (qubit1, qubit2)
-        foundBetterEdge = False
-        for edge in uniqueEdges:
-            # First parth of if checks if each qubit is within desired distance to source.
-            if (self.couplingMap.distance(qubit1, edge[0]) <= depth and self.couplingMap.distance(qubit1, edge[1]) <= depth
-                and self.couplingMap.distance(qubit2, edge[0]) <= depth and self.couplingMap.distance(qubit2, edge[1]) <= depth):
-
-                # This function predicts the accuracy of a new link
-                newLinkAccuracy = self.calc_path_accuracy(bestEdge, edge, currentLayout)
-                if newLinkAccuracy > bestEdgeAccuracy:
-                    bestEdgeAccuracy = newLinkAccuracy
-                    bestEdge = edge
-                    foundBetterEdge = True
-        if foundBetterEdge == False:
-            bestEdge = None
-        return bestEdge
+        # Keep the set's iteration order so candidates are visited in the same order as before
+        return list(uniqueEdges)
+
+    def build_neighbor_arrays(self):
+        """
+        The coupling graph without edge directions in compressed sparse row form. The neighbors of qubit q are
+        neighborQubits[neighborStart[q]:neighborStart[q+1]], and neighborEdges has the link index of each of them.
+        Neighbors are in the order their edge first shows up in get_edges, the same order a networkx graph built
+        from the edges would have, so searches over it find the same paths
+        """
+        neighbors = [dict() for qubit in range(self.couplingMap.size())]
+        for edge in self.couplingMap.get_edges():
+            neighbors[edge[0]].setdefault(edge[1], self.edgeIds[edge[0], edge[1]])
+            neighbors[edge[1]].setdefault(edge[0], self.edgeIds[edge[0], edge[1]])
+        neighborStart = np.zeros(len(neighbors) + 1, dtype=np.int32)
+        neighborStart[1:] = np.cumsum([len(qubitNeighbors) for qubitNeighbors in neighbors])
+        neighborQubits = np.array([qubit for qubitNeighbors in neighbors for qubit in qubitNeighbors], dtype=np.int32)
+        neighborEdges = np.array([edgeId for qubitNeighbors in neighbors for edgeId in qubitNeighbors.values()], dtype=np.int32)
+        return neighborStart, neighborQubits, neighborEdges
+
+    def get_neighbors(self, qubit):
+        # The qubits connected to a physical qubit, as a list of ints
+        return self.neighborQubits[self.neighborStart[qubit]:self.neighborStart[qubit + 1]].tolist()
+
+    def get_basic_path(self, qubit1, qubit2, pathEngine=None):
+        # The path BasicSwap takes between two physical qubits: the most reliable one with reliablePaths, otherwise
+        # the shortest. pathEngine is a ReliablePaths from make_path_engine to take it from instead of HERR's own, for
+        # routing with other accuracies. Callers should not modify the returned list
+        if pathEngine is not None:
+            return pathEngine.path(qubit1, qubit2)
+        key = (qubit1, qubit2)
+        if key not in self.basicPaths:
+            if self.reliablePaths:
+                if self.pathEngine is None:
+                    self.pathEngine = self.make_path_engine(self.linkAccuracy)
+                self.basicPaths[key] = self.pathEngine.path(qubit1, qubit2)
+            else:
+                self.basicPaths[key] = list(self.couplingMap.shortest_undirected_path(qubit1, qubit2))
+        return self.basicPaths[key]
+
+    def make_path_engine(self, linkAccuracy):
+        # The most reliable paths for some link accuracies. Each qubit's paths are only worked out once a path starts
+        # from it, so after the accuracies change nothing is paid for until a path is needed again
+        return HERRPaths.ReliablePaths(self.couplingMap.size(), self.uniqueEdges, linkAccuracy, allPairs=False)
+
+    def find_baseline_links(self, qubit1, qubit2, pathEngine=None):
+        # The links of the swaps BasicSwap does for a gate on two physical qubits that aren't connected
+        path = self.get_basic_path(qubit1, qubit2, pathEngine)
+        return [self.edgeIds[path[swap], path[swap + 1]] for swap in range(len(path) - 2)]
+
+    def build_candidate_index(self, depth):
+        """
+        Builds a dictionary that maps each (sorted) pair of physical qubits to the list of edges where
+        both ends of the edge are within depth of both qubits. These are the only edges find_better_link
+        ever has to score for a gate on that pair.
+
+        Args:
+            depth: Search depth the index is built for
+        """
+        distances = self.couplingMap.distance_matrix
+        candidateEdges = dict()
+        for edge in self.uniqueEdges:
+            # Qubits that can reach both ends of this edge within the search depth
+            edgeDistance = np.maximum(distances[:, edge[0]], distances[:, edge[1]])
+            nearQubits = np.flatnonzero(edgeDistance <= depth).tolist()
+            for i, qubit1 in enumerate(nearQubits):
+                for qubit2 in nearQubits[i+1:]:
+                    candidateEdges.setdefault((qubit1, qubit2), []).append(edge)
+        return candidateEdges
+
+    def update_accuracy(self, accuracies):
+        """
+        Changes the accuracy of some links, for when a device gets a new calibration. Everything HERR has worked
+        out about the coupling map is kept, only the accuracies and the beam search moves that used them are
+        changed, so this is a lot faster than making a new HERR. The qubitAccuracy graph is updated too.
+
+        Args:
+            accuracies: Dictionary mapping edges (qubit1, qubit2) to their new accuracy
+        """
+        changedLinks = set()
+        for edge, weight in accuracies.items():
+            edge = tuple(edge)
+            if edge not in self.edgeIds:
+                raise TranspilerError("Edge " + str(edge) + " is not in the coupling map")
+            edgeId = self.edgeIds[edge]
+            self.qubitAccuracy.add_edge(edge[0], edge[1], weight=weight)
+            self.linkAccuracy[edgeId] = weight
+            self.swapAccuracy[edgeId] = weight**3
+            changedLinks.add(edgeId)
+
+        if self.reliablePaths and len(changedLinks) > 0:
+            # Any link can change which path is the most reliable, so the paths and everything using them start over.
+            # They are only worked out again as routing needs them
+            self.routeOptions, self.optionLinks = dict(), dict()
+            self.reset_paths()
+            return
+        for edgeId in changedLinks:
+            for key in self.optionLinks.pop(edgeId, set()):
+                self.routeOptions.pop(key, None)
+
+    def use_accuracy_arrays(self, linkAccuracy, swapAccuracy):
+        # Routes with other accuracy arrays from now on, for run_sweep. qubitAccuracy is left alone
+        self.linkAccuracy, self.swapAccuracy = linkAccuracy, swapAccuracy
+        self.routeOptions, self.optionLinks = dict(), dict()
+        if self.reliablePaths:
+            self.reset_paths()
+
+    def reset_paths(self):
+        # Throws out the most reliable paths after the accuracies change. The candidate tables see that pathVersion
+        # went up and work their baseline out again the next time they are used, so this costs nothing up front
+        self.pathEngine = None
+        self.basicPaths = dict()
+        self.pathVersion += 1
+
+    def build_accuracy_arrays(self):
+        # Reads the weight of every unique edge out of the noise graph
+        linkAccuracy = np.ones(len(self.uniqueEdges) + 1)
+        swapAccuracy = np.ones(len(self.uniqueEdges) + 1)
+        for edgeId, edge in enumerate(self.uniqueEdges):
+            if not self.qubitAccuracy.has_edge(edge[0], edge[1]):
+                raise TranspilerError("qubitAccuracy has no weight for coupling map edge " + str(edge))
+            weight = self.qubitAccuracy.edges[edge[0], edge[1]]['weight']
+            linkAccuracy[edgeId] = weight
+            # Done with python floats so it is the exact same number calc_path_accuracy gets
+            swapAccuracy[edgeId] = weight**3
+        return linkAccuracy, swapAccuracy
+
+    def get_candidate_table(self, qubit1, qubit2, depth):
+        """
+        Returns the CandidateTable for a gate on physical qubits (qubit1, qubit2). Tables are built the first
+        time a pair is seen and kept for every later gate and run
+        """
+        key = (qubit1, qubit2, depth)
+        if key in self.candidateTables:
+            table = self.candidateTables[key]
+            if table.pathVersion != self.pathVersion:
+                if table.baselineEdge is None:
+                    table.baselineLinks = self.find_baseline_links(qubit1, qubit2)
+                table.pathVersion = self.pathVersion
+            return table
+
+        edges = self.find_candidate_edges(qubit1, qubit2, depth)
+        edgeIds = np.array([self.edgeIds[edge] for edge in edges], dtype=int)
+        baselineEdge = self.edgeIds.get((qubit1, qubit2))
+        baselineLinks = list()
+        if baselineEdge is None:
+            baselineLinks = self.find_baseline_links(qubit1, qubit2)
+
+        table = CandidateTable(edges, edgeIds, baselineEdge, baselineLinks, self.pathVersion)
+        self.candidateTables[key] = table
+        return table
+
+    def get_candidate_routes(self, table, sourceQubits):
+        # Returns the CandidateRoutes from sourceQubits to every edge in the table, working them out the first time
+        if sourceQubits in table.routes:
+            return table.routes[sourceQubits]
+
+        padding = len(self.uniqueEdges)
+        paths = [self.find_shortest_path(sourceQubits, edge) for edge in table.edges]
+        touchedColumns = dict()
+        for qubitPath in paths:
+            for i in range(2):
+                if qubitPath[i] is not None:
+                    for qubit in qubitPath[i]:
+                        touchedColumns.setdefault(qubit, len(touchedColumns))
+
+        valid = np.ones(len(table.edges), dtype=bool)
+        touched = np.zeros((len(table.edges), len(touchedColumns)), dtype=bool)
+        pathLinks = [list(), list()]
+        for c, qubitPath in enumerate(paths):
+            if qubitPath[0] is None and qubitPath[1] is None:
+                valid[c] = False
+            for i in range(2):
+                links = list()
+                if qubitPath[i] is not None:
+                    touched[c, [touchedColumns[qubit] for qubit in qubitPath[i]]] = True
+                    for swap in range(0, len(qubitPath[i])-1, 1):
+                        links.append(self.edgeIds[qubitPath[i][swap], qubitPath[i][swap + 1]])
+                pathLinks[i].append(links)
+
+        # Pad the paths out to the same length so they can be stacked into arrays
+        for i in range(2):
+            longest = max([len(links) for links in pathLinks[i]], default=0)
+            padded = np.full((len(table.edges), longest), padding, dtype=int)
+            for c, links in enumerate(pathLinks[i]):
+                padded[c, :len(links)] = links
+            pathLinks[i] = padded
+
+        routes = CandidateRoutes(paths, pathLinks, valid, touched, touchedColumns)
+        table.routes[sourceQubits] = routes
+        return routes
+
+    def score_candidates(self, table, sourceQubits, linkAccuracy=None, swapAccuracy=None):
+        """
+        Vectorized calc_path_accuracy from sourceQubits to every candidate in a table. The multiplications happen in the
+        same order as calc_path_accuracy so the scores are exactly equal to it, which keeps ties going the same way.
+        By default this uses HERR's own accuracies, stacked accuracy arrays give one row of scores per noise graph
+        """
+        if linkAccuracy is None:
+            linkAccuracy, swapAccuracy = self.linkAccuracy, self.swapAccuracy
+        routes = self.get_candidate_routes(table, sourceQubits)
+        shape = linkAccuracy.shape[:-1] + (len(table.edges),)
+        qubitPathAccuracy = [np.ones(shape), np.ones(shape)]
+        for i in range(2):
+            for swap in range(routes.pathLinks[i].shape[1]):
+                qubitPathAccuracy[i] = qubitPathAccuracy[i] * swapAccuracy[..., routes.pathLinks[i][:, swap]]
+        opAccuracy = linkAccuracy[..., table.edgeIds]
+        candidateAccuracy = opAccuracy*qubitPathAccuracy[0]*qubitPathAccuracy[1]
+        candidateAccuracy[..., ~routes.valid] = 0
+        return candidateAccuracy
+
+    def calc_baseline_accuracy(self, table, linkAccuracy=None, swapAccuracy=None, baselineLinks=None):
+        # The accuracy of doing the gate without going to a better edge. baselineLinks are the swaps to use instead of
+        # the table's, when the accuracies have their own BasicSwap path
+        if linkAccuracy is None:
+            linkAccuracy, swapAccuracy = self.linkAccuracy, self.swapAccuracy
+        if table.baselineEdge is not None:
+            return linkAccuracy[..., table.baselineEdge].copy()
+        if baselineLinks is None:
+            baselineLinks = table.baselineLinks
+        accuracy = np.ones(linkAccuracy.shape[:-1])
+        for link in baselineLinks:
+            accuracy = accuracy * swapAccuracy[..., link]
+        return accuracy
+
+    def calc_basic_swap_accuracy(self, qubit1, qubit2, linkAccuracy=None, swapAccuracy=None, pathEngine=None):
+        # Predicted accuracy of a gate on (qubit1, qubit2) done the BasicSwap way: the swaps down the shortest
+        # path, then the gate on the last link of it. pathEngine is the ReliablePaths to take the path from, if the
+        # accuracies aren't HERR's own (see get_basic_path)
+        if linkAccuracy is None:
+            linkAccuracy, swapAccuracy = self.linkAccuracy, self.swapAccuracy
+        table = self.get_candidate_table(qubit1, qubit2, self.searchDepth)
+        baselineLinks = None
+        if pathEngine is not None and table.baselineEdge is None:
+            baselineLinks = self.find_baseline_links(qubit1, qubit2, pathEngine)
+        accuracy = self.calc_baseline_accuracy(table, linkAccuracy, swapAccuracy, baselineLinks)
+        if table.baselineEdge is None:
+            path = self.get_basic_path(qubit1, qubit2, pathEngine)
+            accuracy = accuracy * linkAccuracy[..., self.edgeIds[path[-2], path[-1]]]
+        return accuracy
+
+    def find_candidate_edges(self, qubit1, qubit2, depth):
+        """
+        Returns the edges that are within depth of both qubits, in the order find_better_link scores them
+
+        Args:
+            qubit1: First physical qubit being used in gate
+            qubit2: Second physical qubit being used in gate
+            depth: How far away from the qubits to look
+        """
+        if depth == self.searchDepth and self.candidateEdges is not None:
+            return self.candidateEdges.get(tuple(sorted((qubit1, qubit2))), [])
+
+        # Not indexed, so look at the edges between qubits that are in both neighborhoods
+        nearQubit1 = self.get_neighborhood(qubit1, depth)
+        nearQubit2 = self.get_neighborhood(qubit2, depth)
+        candidateIds = list()
+        for qubit in nearQubit1:
+            if qubit in nearQubit2:
+                for neighbor in self.get_neighbors(qubit):
+                    if qubit < neighbor and neighbor in nearQubit1 and neighbor in nearQubit2:
+                        candidateIds.append(self.edgeIds[qubit, neighbor])
+        # Same order as uniqueEdges, which is the order the index has them in
+        return [self.uniqueEdges[edgeId] for edgeId in sorted(candidateIds)]
+
+    def get_neighborhood(self, qubit, depth):
+        """
+        Returns the physical qubits within depth of qubit (ignoring edge direction), found with a breadth first search
+        that stops at depth. Kept for later gates
+        """
+        key = (qubit, depth)
+        if key not in self.neighborhoods:
+            neighborhood = {qubit}
+            frontier = [qubit]
+            for distance in range(depth):
+                nextFrontier = list()
+                for current in frontier:
+                    for neighbor in self.get_neighbors(current):
+                        if neighbor not in neighborhood:
+                            neighborhood.add(neighbor)
+                            nextFrontier.append(neighbor)
+                frontier = nextFrontier
+            self.neighborhoods[key] = neighborhood
+        return self.neighborhoods[key]
 
     def find_path_excluding(self, sourceQubit, destQubit, exQubit):
         # Get a subgraph of coupling map without Ex qubit, find shortest path
         # This function finds the path from one qubit to another. Problem is since we are finding the path for BOTH qubits
         # we encounter a problem if the path one qubit takes goes through the other qubit. So we create a subgraph that exludes the
         # other argument qubit
+        # The paths only depend on the coupling map, so every answer is remembered. Callers should not modify the returned list
         if sourceQubit == destQubit:
-            return None 
-        reducedCouplingGraph = nx.Graph()
-        subGraphEdges = list()
-        couplingMapEdges = self.couplingMap.get_edges()
-        for edge in couplingMapEdges:
-            if exQubit not in edge:
-                subGraphEdges.append(edge)
-        reducedCouplingGraph.add_edges_from(subGraphEdges)
-        if sourceQubit in reducedCouplingGraph and destQubit in reducedCouplingGraph:
-            try:
-                shortestPath = nx.shortest_path(reducedCouplingGraph, sourceQubit, destQubit)
-            except:
-                shortestPath = None
-        else:
-            shortestPath = None
+            return None
+        key = (sourceQubit, destQubit, exQubit)
+        if key in self.excludedPaths:
+            return self.excludedPaths[key]
+
+        shortestPath = self.bidirectional_search(sourceQubit, destQubit, exQubit)
+        self.excludedPaths[key] = shortestPath
         return shortestPath
 
+    def bidirectional_search(self, sourceQubit, destQubit, exQubit):
+        """
+        Shortest path between two qubits on the coupling graph without going through exQubit, or None if there isn't
+        one. The search goes out from both ends at once, so it only covers the area around the two qubits instead of
+        the whole device. This is the same search networkx's shortest_path does, with neighbors visited in the same
+        order, so it finds the same path as running that on a copy of the coupling graph with exQubit removed
+
+        Args:
+            sourceQubit: Physical qubit the path starts at
+            destQubit: Physical qubit the path ends at
+            exQubit: Physical qubit the path is not allowed to go through
+        """
+        if exQubit in (sourceQubit, destQubit):
+            return None
+        pred = {sourceQubit: None}
+        succ = {destQubit: None}
+        forwardFringe = [sourceQubit]
+        reverseFringe = [destQubit]
+        meet = None
+        while meet is None and forwardFringe and reverseFringe:
+            # Grow whichever side has the smaller fringe
+            if len(forwardFringe) <= len(reverseFringe):
+                thisLevel, forwardFringe, found, other = forwardFringe, list(), pred, succ
+                nextFringe = forwardFringe
+            else:
+                thisLevel, reverseFringe, found, other = reverseFringe, list(), succ, pred
+                nextFringe = reverseFringe
+            for current in thisLevel:
+                for neighbor in self.get_neighbors(current):
+                    if neighbor == exQubit:
+                        continue
+                    if neighbor not in found:
+                        nextFringe.append(neighbor)
+                        found[neighbor] = current
+                    if neighbor in other:
+                        meet = neighbor
+                        break
+                if meet is not None:
+                    break
+        if meet is None:
+            return None
+
+        path = list()
+        qubit = meet
+        while qubit is not None:
+            path.append(qubit)
+            qubit = pred[qubit]
+        path.reverse()
+        qubit = succ[path[-1]]
+        while qubit is not None:
+            path.append(qubit)
+            qubit = succ[qubit]
+        return path
 
     def find_shortest_path(self, sourceQubits, destQubit):
         """
@@ -201,6 +1306,9 @@ class HERR(TransformationPass):
 
         # This is the part of that function that does the comparisons
         if sourceQubits[0] not in destQubit and sourceQubits[1] not in destQubit:
+            if None in q0Paths or None in q1Paths:
+                # One of the qubits can't get there without going through the other one, so this isn't reachable
+                return qubitPath
 
             if len(q0Paths[0]) <= len(q1Paths[0]):
                 qubitPath[0] = q0Paths[0]
@@ -221,28 +1329,27 @@ class HERR(TransformationPass):
         elif sourceQubits[0] not in destQubit:
             # If only qubit 0 is not in destination, we only need to swap to whatever isn't the other qubit
             # ie, if we need to go from [1, 0] to [2, 0], we only need to swap from qubits 1 to 2 
-            if sourceQubits[1] is not destQubit[0]:
+            # Qubits are compared with != since they are ints, and only small ints are always the same object
+            if sourceQubits[1] != destQubit[0]:
                 qubitPath[0] = q0Paths[1]
             else:
                 qubitPath[0] = q0Paths[0]
         elif sourceQubits[1] not in destQubit:
             # If only qubit 1 is not in destination, we only need to swap to whatever isn't the other qubit
             # ie, if we need to go from [0, 1] to [0, 2], we only need to swap from qubits 1 to 2 
-            if sourceQubits[0] is not destQubit[0]:
+            if sourceQubits[0] != destQubit[0]:
                 qubitPath[1] = q1Paths[0]
             else:
                 qubitPath[1] = q1Paths[1]
         return qubitPath
     
     def calc_shortest_path_accuracy(self, qubit1, qubit2):
-        path = self.couplingMap.shortest_undirected_path(qubit1, qubit2)
+        path = self.get_basic_path(qubit1, qubit2)
         accuracy = 1.0
 
         for swap in range(len(path) - 2):
-            connected_wire_1 = path[swap]
-            connected_wire_2 = path[swap + 1]
-            linkAccuracy = self.qubitAccuracy.edges[connected_wire_1, connected_wire_2]['weight']
-            accuracy = accuracy * (linkAccuracy**3)
+            # swapAccuracy is already cubed
+            accuracy = accuracy * float(self.swapAccuracy[self.edgeIds[path[swap], path[swap + 1]]])
 
         return accuracy
 
@@ -262,16 +1369,12 @@ class HERR(TransformationPass):
         for i in range(2):
             if qubitPath[i] is not None:
                 for swap in range(0, len(qubitPath[i])-1, 1):
-                    # Basically find the source and destination qubits of the swap
-                    connected_wire_1 = qubitPath[i][swap]
-                    connected_wire_2 = qubitPath[i][swap + 1]
-
-                    # Reference the noise map to find the error rate
-                    linkAccuracy = self.qubitAccuracy.edges[connected_wire_1, connected_wire_2]['weight']
-                    # Link accuracy ^3 because each swap decomposes into 3 CNOTs
-                    qubitPathAccuracy[i] = qubitPathAccuracy[i] * (linkAccuracy**3)
+                    # Look up the link of the swap. swapAccuracy is the link accuracy ^3 because each swap decomposes
+                    # into 3 CNOTs
+                    edgeId = self.edgeIds[qubitPath[i][swap], qubitPath[i][swap + 1]]
+                    qubitPathAccuracy[i] = qubitPathAccuracy[i] * float(self.swapAccuracy[edgeId])
 
-        opAccuracy = self.qubitAccuracy.edges[destQubit[0], destQubit[1]]['weight']
+        opAccuracy = float(self.linkAccuracy[self.edgeIds[destQubit[0], destQubit[1]]])
         return opAccuracy*qubitPathAccuracy[0]*qubitPathAccuracy[1]
 
 
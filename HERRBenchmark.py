@@ -0,0 +1,394 @@
+import argparse
+import ast
+import csv
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import networkx as nx
+import HERR
+import BenchmarkCircuits
+import CouplingMaps
+import DeviceProfiles
+from qiskit import QuantumCircuit
+from qiskit.compiler import transpile
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.transpiler.passes.routing import BasicSwap, SabreSwap, StochasticSwap, LookaheadSwap
+
+"""
+Runs the HERR benchmarks. There are two modes:
+
+accuracy: each trial makes a random noise model, routes the circuit with each router, then simulates all of them
+    with that noise in one job and records the fraction of shots that gave the right answer
+time: each trial records how many seconds each router takes to route the circuit, counting making the routing pass.
+    HERR works out its candidate tables and accuracy arrays when it's made, so that's part of what it costs
+
+It can be used from the command line, where every option that takes more than one value gets swept over:
+
+    python HERRBenchmark.py --family bv qft --size 4 6 --topology grid jakarta --trials 50 --output results.csv
+
+or from python with run_benchmark (one configuration) and run_sweep (every combination). Each result is a dictionary
+with the configuration, the router, the trial number and its value, and can be written out as CSV or JSON lines.
+The basis gates come from an offline device profile (--device, ibmq_lima by default, see DeviceProfiles.py), so
+nothing needs an IBMQ account.
+Like the old scripts, each trial also prints a line with the value of each router in order.
+
+Trials can run on a pool of worker processes (--workers). Each trial gets its own seed derived from the main seed, so
+the results are the same whatever the number of workers, and they come back in trial order.
+"""
+
+allRouters = ('herr', 'basic', 'sabre', 'lookahead', 'stochastic')
+routingMethods = {'basic': BasicSwap, 'sabre': SabreSwap, 'stochastic': StochasticSwap, 'lookahead': LookaheadSwap}
+
+# The configuration the trial workers are running, see run_trials
+workerContext = None
+# Each process makes its own simulator the first time it needs one
+simulator = None
+# Thread the workers' simulations are run on, see run_trial_in_worker
+workerExecutor = None
+
+
+def init_worker(context):
+    # Used when the workers can't fork and get the configuration from us
+    global workerContext
+    workerContext = context
+
+
+def run_trial_in_worker(task):
+    global workerExecutor
+    if workerExecutor is None:
+        # Thread pools don't survive a fork, so a forked worker can't use the ones it inherits. Aer runs its jobs on
+        # one made when it's imported, so the worker gets its own. Qiskit's Rust passes (sabre, stochastic) use one
+        # too, and like qiskit's own parallel_map this tells them to stay on one thread instead
+        os.environ['QISKIT_IN_PARALLEL'] = 'TRUE'
+        workerExecutor = ThreadPoolExecutor(1)
+    return run_trial(workerContext, task[0], task[1], {'executor': workerExecutor})
+
+
+def get_coupling_map(topology):
+    # A coupling map name from CouplingMaps, or the name of a device profile to use that device's coupling map
+    if DeviceProfiles.has_profile(topology):
+        return DeviceProfiles.load_profile(topology).coupling_map()
+    return CouplingMaps.named_coupling_map(topology)
+
+
+def make_noise(couplingMap, rng, minError=1, maxError=10):
+    """
+    Picks a random error rate for each link, a whole percent from minError up to (not including) maxError. Returns
+    the noise graph for HERR and a dictionary of each link's error rate
+
+    Args:
+        couplingMap: Device to make the noise for
+        rng: random.Random to draw from
+        minError: Lowest error rate in percent
+        maxError: Error rates are below this, in percent
+    """
+    errorRates = dict()
+    noiseGraph = nx.Graph()
+    noiseGraph.add_nodes_from(couplingMap.physical_qubits)
+    # Sorted so a seed always gives each link the same error rate
+    for edge in sorted(set(tuple(sorted(edge)) for edge in couplingMap.get_edges())):
+        errorRates[edge] = rng.randrange(minError, maxError, 1)/100.0
+        noiseGraph.add_edge(edge[0], edge[1], weight=1-errorRates[edge])
+    return noiseGraph, errorRates
+
+
+def trial_seeds(seed, trials):
+    """
+    Returns a seed for each trial, derived from seed with numpy's SeedSequence. A trial's seed only depends on seed and
+    the trial's number, so a trial draws the same noise whichever worker runs it and in whatever order
+    """
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(trials)]
+
+
+def get_simulator():
+    global simulator
+    if simulator is None:
+        from qiskit import Aer
+        simulator = Aer.get_backend('qasm_simulator')
+    return simulator
+
+
+def make_noise_model(errorRates):
+    # Aer noise model with a depolarizing error on the CNOTs of each link, both ways
+    import qiskit.providers.aer.noise as noise
+    noiseModel = noise.NoiseModel()
+    for edge, errorRate in errorRates.items():
+        error = noise.depolarizing_error(errorRate, 2)
+        noiseModel.add_quantum_error(error, ['cx'], [edge[0], edge[1]])
+        noiseModel.add_quantum_error(error, ['cx'], [edge[1], edge[0]])
+    return noiseModel
+
+
+def run_benchmark(family='bv', size=4, topology='grid', routers=allRouters, mode='accuracy', trials=200, shots=1024,
+                  seed=0, secret=None, minError=1, maxError=10, herrOptions=None, printTrials=False,
+                  device=DeviceProfiles.defaultDevice, workers=1, parallelExperiments=None):
+    """
+    Runs one benchmark configuration and returns a list of results, one per router per trial
+
+    Args:
+        family: Circuit family, see BenchmarkCircuits.make_circuit
+        size: Size of the circuit, see BenchmarkCircuits.make_circuit
+        topology: Coupling map name, see CouplingMaps.named_coupling_map, or a device profile name
+        routers: Routers to compare, any of 'herr', 'basic', 'sabre', 'lookahead' and 'stochastic'
+        mode: 'accuracy' or 'time'
+        trials: Number of random noise models to try
+        shots: Shots per simulation, for accuracy mode
+        seed: Seed for the noise, the simulator and the routers that use randomness
+        secret: Bit string for the circuit instead of the default one
+        minError: Lowest link error rate in percent
+        maxError: Link error rates are below this, in percent
+        herrOptions: Dictionary of extra arguments for HERR
+        printTrials: Print a line for each trial with each router's value
+        device: Device profile whose basis gates the circuits are compiled to
+        workers: Number of worker processes to run the trials on, None for one per CPU. The results don't depend on
+            it, but in time mode the workers compete for the CPUs, which the timings will show
+        parallelExperiments: How many of a trial's circuits the simulator can run at once, Aer's default if None.
+            With more than one worker each worker gets this many threads (one without it), so workers times this
+            should be about the number of CPUs
+    """
+    for router in routers:
+        if router != 'herr' and router not in routingMethods:
+            raise ValueError("Unknown router " + repr(router))
+    if mode not in ('accuracy', 'time'):
+        raise ValueError("mode has to be 'accuracy' or 'time'")
+    herrOptions = dict(herrOptions or {})
+    circuit, expected = BenchmarkCircuits.make_circuit(family, size, secret)
+    couplingMap = get_coupling_map(topology)
+    basisGates = DeviceProfiles.load_profile(device).basisGates
+    if circuit.num_qubits > couplingMap.size():
+        raise ValueError("The " + family + " circuit of size " + str(size) + " has " + str(circuit.num_qubits) +
+                         " qubits, more than " + topology + " has")
+    if mode == 'time' and circuit.num_qubits < couplingMap.size():
+        # The qiskit routing passes need a qubit in the circuit for every qubit of the device, which transpile adds
+        # as ancillas before routing. Doing the same here means every router times the same circuit
+        wideCircuit = QuantumCircuit(couplingMap.size(), circuit.num_clbits)
+        circuit = wideCircuit.compose(circuit, qubits=range(circuit.num_qubits), clbits=range(circuit.num_clbits))
+    config = {'family': family, 'size': size, 'topology': topology, 'mode': mode, 'seed': seed, 'device': device}
+    # Everything a trial needs, which the workers get once instead of with every trial
+    context = {'circDag': circuit_to_dag(circuit), 'expected': expected, 'couplingMap': couplingMap,
+               'basisGates': basisGates, 'routers': routers, 'mode': mode, 'shots': shots, 'seed': seed,
+               'minError': minError, 'maxError': maxError, 'herrOptions': herrOptions, 'simOptions': dict()}
+
+    if mode == 'accuracy':
+        sim = get_simulator()
+        # The other routers don't look at the noise, so they only need to be compiled once
+        transpiled = dict()
+        for router in routers:
+            if router != 'herr':
+                transpiled[router] = transpile(circuit, sim, coupling_map=couplingMap, basis_gates=basisGates,
+                                               routing_method=router, layout_method='trivial', seed_transpiler=seed)
+        context['transpiled'] = transpiled
+        # Shots are never split up between threads, however many workers there are, so the simulator draws them the
+        # same way in a pool as in this process. Any threads it gets go to the experiments and the state instead
+        context['simOptions']['max_parallel_shots'] = 1
+        if workers != 1:
+            # The workers already use every core, so each simulation sticks to one thread per experiment it's allowed
+            # to run at once. A cap of 1 would leave Aer nothing to run the experiments at the same time on
+            context['simOptions']['max_parallel_threads'] = parallelExperiments or 1
+        if parallelExperiments is not None:
+            context['simOptions']['max_parallel_experiments'] = parallelExperiments
+
+    results = list()
+    for trial, (values, predicted) in enumerate(run_trials(context, trial_seeds(seed, trials), workers)):
+        for router in routers:
+            result = dict(config, router=router, trial=trial, value=values[router])
+            if router == 'herr':
+                result['predicted'] = predicted
+            results.append(result)
+        if printTrials:
+            print(" ".join(str(values[router]) for router in routers))
+    return results
+
+
+def run_trials(context, seeds, workers=1):
+    """
+    Runs a trial for each seed and yields each one's (values, predicted) in order as soon as it is done
+
+    Args:
+        context: The configuration, made by run_benchmark
+        seeds: Seed of each trial, see trial_seeds
+        workers: Number of worker processes, None for one per CPU. 1 runs the trials in this process
+    """
+    global workerContext
+    tasks = list(enumerate(seeds))
+    if workers == 1:
+        for trial, trialSeed in tasks:
+            yield run_trial(context, trial, trialSeed)
+        return
+
+    processContext = multiprocessing.get_context()
+    if processContext.get_start_method() == 'fork':
+        # The workers get the configuration when they fork, so only the trial numbers and seeds get pickled
+        workerContext = context
+        # Freezing stops the workers' garbage collector from walking (and so copying) everything they inherit
+        gc.freeze()
+        try:
+            pool = processContext.Pool(workers)
+        finally:
+            gc.unfreeze()
+    else:
+        pool = processContext.Pool(workers, initializer=init_worker, initargs=(context,))
+    try:
+        with pool:
+            # imap gives the results back in the order of the tasks, whichever worker finishes first
+            for trialResult in pool.imap(run_trial_in_worker, tasks):
+                yield trialResult
+    finally:
+        workerContext = None
+
+
+def run_trial(context, trial, trialSeed, simOptions=None):
+    """
+    Runs one trial: draws the noise from trialSeed, then routes (and in accuracy mode simulates) with each router.
+    Returns a dictionary of each router's value, and HERR's predicted success probability. simOptions are extra
+    options for the simulator on top of the context's
+    """
+    rng = random.Random(trialSeed)
+    routers = context['routers']
+    couplingMap = context['couplingMap']
+    circDag = context['circDag']
+    seed = context['seed']
+    herrOptions = context['herrOptions']
+    noiseGraph, errorRates = make_noise(couplingMap, rng, context['minError'], context['maxError'])
+    values = dict()
+    predicted = None
+    if context['mode'] == 'accuracy':
+        sim = get_simulator()
+        transpiled = dict(context['transpiled'])
+        if 'herr' in routers:
+            herr = HERR.HERR(couplingMap, noiseGraph, **herrOptions)
+            updatedCirc = dag_to_circuit(herr.run(circDag))
+            predicted = herr.property_set['herr_success_probability']
+            # We ran HERR, but we need to do the rest of the transpiling process to get it ready for hardware
+            transpiled['herr'] = transpile(updatedCirc, sim, coupling_map=couplingMap, basis_gates=context['basisGates'],
+                                           routing_method='basic', layout_method='trivial', seed_transpiler=seed)
+        noiseModel = make_noise_model(errorRates)
+        simSeed = rng.randrange(1 << 30)
+        shots = context['shots']
+        simOptions = dict(context['simOptions'], **(simOptions or {}))
+        # Every router's circuit goes in one job, so setting up the job and the noise model is only done once a trial
+        result = sim.run([transpiled[router] for router in routers], noise_model=noiseModel, shots=shots,
+                         seed_simulator=simSeed, **simOptions).result()
+        for index, router in enumerate(routers):
+            values[router] = result.get_counts(index).get(context['expected'], 0)/shots
+    else:
+        for router in routers:
+            # The timer starts before the pass is made, since HERR does its set up for the noise graph then
+            baseTime = time.perf_counter()
+            if router == 'herr':
+                routingPass = HERR.HERR(couplingMap, noiseGraph, **herrOptions)
+            elif router in ('sabre', 'stochastic'):
+                routingPass = routingMethods[router](couplingMap, seed=seed)
+            else:
+                routingPass = routingMethods[router](couplingMap)
+            routingPass.run(circDag)
+            values[router] = time.perf_counter() - baseTime
+            if router == 'herr':
+                predicted = routingPass.property_set['herr_success_probability']
+    return values, predicted
+
+
+def run_sweep(families=('bv',), sizes=(4,), topologies=('grid',), seeds=(0,), **options):
+    """
+    Runs run_benchmark for every combination of families, sizes, topologies and seeds and returns all the results.
+    Combinations where the circuit has more qubits than the device are skipped. options are passed on to run_benchmark
+    """
+    results = list()
+    for family, size, topology, seed in itertools.product(families, sizes, topologies, seeds):
+        numQubits = BenchmarkCircuits.make_circuit(family, size, options.get('secret'))[0].num_qubits
+        if numQubits > get_coupling_map(topology).size():
+            print("Skipping " + family + " size " + str(size) + " on " + topology + ", the circuit doesn't fit")
+            continue
+        results.extend(run_benchmark(family, size, topology, seed=seed, **options))
+    return results
+
+
+def summarize(results):
+    # Mean value of each router for each configuration, as lines of text
+    totals = dict()
+    for result in results:
+        key = (result['family'], result['size'], result['topology'], result['seed'], result['router'])
+        total = totals.setdefault(key, [0.0, 0])
+        total[0] += result['value']
+        total[1] += 1
+    return [" ".join(str(part) for part in key) + " mean " + str(total[0]/total[1]) for key, total in totals.items()]
+
+
+def write_results(results, path):
+    # Writes the results as CSV if path ends in .csv, otherwise as one JSON object per line
+    if path.endswith('.csv'):
+        fieldNames = list()
+        for result in results:
+            for name in result:
+                if name not in fieldNames:
+                    fieldNames.append(name)
+        with open(path, 'w', newline='') as resultFile:
+            writer = csv.DictWriter(resultFile, fieldNames)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, 'w') as resultFile:
+            for result in results:
+                resultFile.write(json.dumps(result) + "\n")
+
+
+def parse_option(text):
+    # A KEY=VALUE HERR option from the command line. VALUE is a python literal, or a string if it isn't one
+    key, _, value = text.partition('=')
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HERR benchmarks. Options with more than one value are swept over")
+    parser.add_argument('--family', nargs='+', default=['bv'], choices=BenchmarkCircuits.families)
+    parser.add_argument('--size', nargs='+', type=int, default=[4])
+    parser.add_argument('--topology', nargs='+', default=['grid'],
+                        help="square, grid, jakarta, grid-RxC, heavy-hex-D, line-N, ring-N, full-N or a device "
+                             "profile name like ibmq_lima")
+    parser.add_argument('--device', default=DeviceProfiles.defaultDevice,
+                        help="Device profile for the basis gates, from " + DeviceProfiles.profile_directory() +
+                             " or bundled: " + ", ".join(sorted(DeviceProfiles.bundledProfiles)))
+    parser.add_argument('--routers', nargs='+', default=list(allRouters), choices=allRouters)
+    parser.add_argument('--mode', default='accuracy', choices=('accuracy', 'time'))
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--shots', type=int, default=1024)
+    parser.add_argument('--seed', nargs='+', type=int, default=[0])
+    parser.add_argument('--secret', default=None, help="Bit string for the bv and qft circuits")
+    parser.add_argument('--min-error', type=int, default=1, help="Lowest link error rate in percent")
+    parser.add_argument('--max-error', type=int, default=10, help="Link error rates are below this, in percent")
+    parser.add_argument('--herr-option', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra HERR argument, like searchDepth=3. Can be given more than once")
+    parser.add_argument('--output', default=None, help="File to write the results to, .csv or JSON lines")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes to run the trials on, 0 for one per CPU. Doesn't change the results")
+    parser.add_argument('--parallel-experiments', type=int, default=None,
+                        help="How many of a trial's circuits the simulator runs at once, Aer's default if not given. "
+                             "With --workers each worker gets this many threads, so keep workers times this near the "
+                             "number of CPUs")
+    parser.add_argument('--quiet', action='store_true', help="Don't print a line for each trial")
+    args = parser.parse_args(argv)
+
+    results = run_sweep(args.family, args.size, args.topology, args.seed, routers=args.routers, mode=args.mode,
+                        trials=args.trials, shots=args.shots, secret=args.secret, minError=args.min_error,
+                        maxError=args.max_error, herrOptions=dict(parse_option(text) for text in args.herr_option),
+                        printTrials=not args.quiet, device=args.device,
+                        workers=args.workers or None, parallelExperiments=args.parallel_experiments)
+    if args.output is not None:
+        write_results(results, args.output)
+    for line in summarize(results):
+        print(line)
+    return results
+
+
+if __name__ == '__main__':
+    main()
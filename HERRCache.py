@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+from qiskit.dagcircuit import DAGCircuit
+
+# Part of every key. Bump it when a change to HERR changes how circuits get routed or what an entry holds, so entries
+# saved to disk by an older version are missed instead of handed back
+cacheVersion = 1
+
+
+class RoutingCache:
+    """
+    Remembers the circuits HERR has routed so routing the same circuit on the same device with the same noise
+    just hands back the earlier result. Entries are keyed by the structure of the circuit, the coupling map edges,
+    the link accuracies rounded to a number of decimals, the initial layout, and the HERR options that change routing.
+
+    One cache can be shared by many HERR objects, which is how the benchmarks use it since they make a new
+    HERR for every trial.
+    """
+
+    def __init__(self, maxSize=128, directory=None, decimals=6):
+        """
+        Args:
+            maxSize: Most routed circuits kept in memory, the least recently used one is dropped after that
+            directory: If given, routed circuits are also pickled to this folder and read back on a miss
+            decimals: Accuracies are rounded to this many decimals before going into the key. Fewer decimals means
+                more hits, but noise graphs that are only close to each other will share a routing
+        """
+        self.maxSize = maxSize
+        self.directory = directory
+        self.decimals = decimals
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def make_key(self, dag, herr):
+        """
+        Returns the key for routing dag with a HERR object. It includes where the circuit starts, since that changes
+        the routing too, and cacheVersion
+
+        Args:
+            dag: The DAG being routed
+            herr: The HERR object routing it
+        """
+        keyParts = [cacheVersion, self.hash_dag(dag), tuple(herr.uniqueEdges), herr.routing_options(), tuple(herr.get_initial_layout(dag))]
+        keyParts.append(tuple(round(float(accuracy), self.decimals) for accuracy in herr.linkAccuracy[:len(herr.uniqueEdges)]))
+        return hashlib.sha256(repr(keyParts).encode()).hexdigest()
+
+    def hash_dag(self, dag):
+        # Structural hash of a circuit: registers, then every gate in topological order with its
+        # parameters and the index of each bit it uses
+        qubitIndex = {qubit: i for i, qubit in enumerate(dag.qubits)}
+        clbitIndex = {clbit: i for i, clbit in enumerate(dag.clbits)}
+        structure = hashlib.sha256()
+        structure.update(repr([(qreg.name, qreg.size) for qreg in dag.qregs.values()]).encode())
+        structure.update(repr([(creg.name, creg.size) for creg in dag.cregs.values()]).encode())
+        structure.update(repr(dag.global_phase).encode())
+        for node in dag.topological_op_nodes():
+            condition = getattr(node.op, "condition", None)
+            if condition is not None:
+                if condition[0] in clbitIndex:
+                    condition = (clbitIndex[condition[0]], condition[1])
+                else:
+                    condition = (condition[0].name, condition[1])
+            gate = (node.op.name, [str(param) for param in node.op.params], [qubitIndex[qubit] for qubit in node.qargs],
+                    [clbitIndex[clbit] for clbit in node.cargs], condition)
+            structure.update(repr(gate).encode())
+        return structure.hexdigest()
+
+    def get(self, key):
+        """
+        Returns a copy of the routed DAG stored under key and its predicted success probability, or None if
+        there isn't one
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            dag, successProbability = self.entries[key]
+            return copy_dag(dag), successProbability
+
+        if self.directory is not None:
+            path = os.path.join(self.directory, key + ".pickle")
+            if os.path.exists(path):
+                with open(path, "rb") as cacheFile:
+                    dag, successProbability = pickle.load(cacheFile)
+                self.store(key, dag, successProbability)
+                self.hits += 1
+                return copy_dag(dag), successProbability
+
+        self.misses += 1
+        return None
+
+    def put(self, key, dag, successProbability=None):
+        """
+        Saves a routed DAG and its predicted success probability under key, and to disk if the cache has a directory
+        """
+        self.store(key, copy_dag(dag), successProbability)
+        if self.directory is not None:
+            path = os.path.join(self.directory, key + ".pickle")
+            # Write then rename so a half written file is never read back
+            with open(path + ".tmp", "wb") as cacheFile:
+                pickle.dump((dag, successProbability), cacheFile)
+            os.replace(path + ".tmp", path)
+
+    def store(self, key, dag, successProbability=None):
+        # Adds to the in memory part, dropping the least recently used entry when it's full
+        self.entries[key] = (dag, successProbability)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        # Empties the in memory part. Files on disk are left alone
+        self.entries.clear()
+
+
+def copy_dag(dag):
+    """
+    Copies a DAG gate by gate. The operations are shared, the same as the routing passes do, so this is
+    a lot cheaper than a deepcopy
+    """
+    new_dag = DAGCircuit()
+    new_dag.name = dag.name
+    new_dag.metadata = dag.metadata
+    for qreg in dag.qregs.values():
+        new_dag.add_qreg(qreg)
+    for creg in dag.cregs.values():
+        new_dag.add_creg(creg)
+    new_dag.global_phase = dag.global_phase
+    for node in dag.topological_op_nodes():
+        new_dag.apply_operation_back(node.op, qargs=node.qargs, cargs=node.cargs)
+    return new_dag
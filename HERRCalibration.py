@@ -0,0 +1,212 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import networkx as nx
+
+from qiskit.transpiler import CouplingMap
+
+
+class CalibrationLoader:
+    """
+    Reads a device's calibration from a file on disk and turns it into what HERR takes, so the benchmarks don't need
+    to build the noise graph by hand or log in to IBMQ. The files can be:
+
+    1) JSON from backend.properties().to_dict(), the CX gates' gate_error is used
+    2) JSON with an "edges" list of [qubit1, qubit2, error]
+    3) CSV with qubit1,qubit2,error columns
+    4) The calibration CSV IBM's website gives, where each qubit's row has a "CNOT error" column like "0_1:8.9e-3; 0_2:1.1e-2"
+
+    Links are undirected for HERR, so if a file has both directions of a link their errors are averaged. The links of a
+    file are saved in cacheDirectory as a .npy file the first time it's read. After that loading it just maps that file
+    into memory, which is near instant even for big devices. The cache file is tied to the calibration file's size and
+    modification time, so it's made again when the calibration changes.
+    """
+
+    # One row per undirected link, qubit1 < qubit2
+    edgeType = np.dtype([('qubit1', '<i4'), ('qubit2', '<i4'), ('error', '<f8')])
+
+    def __init__(self, cacheDirectory=None):
+        """
+        Args:
+            cacheDirectory: Folder for the cache files. Defaults to a .herrcalibration folder next to each calibration
+                file. False turns the cache off
+        """
+        self.cacheDirectory = cacheDirectory
+        # Calibrations already loaded by this object, by cache key
+        self.loaded = dict()
+
+    def load_edges(self, path):
+        """
+        Returns the calibration's links as an array of edgeType rows, sorted by (qubit1, qubit2). It is read only,
+        since it can be mapped straight from the cache file
+        """
+        key = self.make_key(path)
+        if key in self.loaded:
+            return self.loaded[key]
+
+        cachePath = self.get_cache_path(path, key)
+        if cachePath is not None and os.path.exists(cachePath):
+            edges = np.load(cachePath, mmap_mode='r')
+        else:
+            edges = self.parse(path)
+            edges.setflags(write=False)
+            if cachePath is not None:
+                self.write_cache(cachePath, edges)
+        self.loaded[key] = edges
+        return edges
+
+    def noise_graph(self, path, couplingMap=None):
+        """
+        Returns the calibration as a noise graph for HERR: nodes are qubits and each edge has weight 1 - CX error
+
+        Args:
+            path: Calibration file
+            couplingMap: If given, every link of the coupling map has to be in the calibration, and the graph gets a
+                node for every qubit of the device
+        """
+        edges = self.load_edges(path)
+        noiseGraph = nx.Graph()
+        if couplingMap is not None:
+            noiseGraph.add_nodes_from(couplingMap.physical_qubits)
+        elif len(edges) > 0:
+            noiseGraph.add_nodes_from(range(int(max(edges['qubit1'].max(), edges['qubit2'].max())) + 1))
+        for qubit1, qubit2, error in zip(edges['qubit1'].tolist(), edges['qubit2'].tolist(), edges['error'].tolist()):
+            noiseGraph.add_edge(qubit1, qubit2, weight=1 - error)
+
+        if couplingMap is not None:
+            for edge in couplingMap.get_edges():
+                if not noiseGraph.has_edge(edge[0], edge[1]):
+                    raise ValueError("Calibration " + str(path) + " has no CX error for coupling map edge " + str(tuple(edge)))
+        return noiseGraph
+
+    def accuracies(self, path):
+        # The calibration as a dictionary of (qubit1, qubit2): accuracy, which is what HERR.update_accuracy takes
+        edges = self.load_edges(path)
+        return {(qubit1, qubit2): 1 - error for qubit1, qubit2, error in
+                zip(edges['qubit1'].tolist(), edges['qubit2'].tolist(), edges['error'].tolist())}
+
+    def accuracy_row(self, path, herr):
+        """
+        Returns the accuracy of each of herr's links in the order of herr.uniqueEdges, so calibrations can be stacked
+        into the accuracies array HERR.run_sweep takes
+        """
+        edges = self.load_edges(path)
+        keys = edges['qubit1'].astype(np.int64) * (1 << 32) + edges['qubit2']
+        herrEdges = np.array(herr.uniqueEdges, dtype=np.int64).reshape(-1, 2)
+        herrKeys = herrEdges.min(axis=1) * (1 << 32) + herrEdges.max(axis=1)
+        # keys is sorted since the rows are, so each of herr's links can be found with a binary search
+        positions = np.searchsorted(keys, herrKeys)
+        positions[positions == len(keys)] = 0
+        found = keys[positions] == herrKeys if len(keys) > 0 else np.zeros(len(herrKeys), dtype=bool)
+        if not found.all():
+            missing = herr.uniqueEdges[int(np.argmin(found))]
+            raise ValueError("Calibration " + str(path) + " has no CX error for coupling map edge " + str(tuple(missing)))
+        return 1 - edges['error'][positions]
+
+    def coupling_map(self, path):
+        # A coupling map with every link of the calibration, both ways
+        edges = self.load_edges(path)
+        couplingList = list()
+        for qubit1, qubit2 in zip(edges['qubit1'].tolist(), edges['qubit2'].tolist()):
+            couplingList.append([qubit1, qubit2])
+            couplingList.append([qubit2, qubit1])
+        return CouplingMap(couplingList)
+
+    def make_key(self, path):
+        # Calibration files are identified by where they are, how big they are and when they were last changed
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        return hashlib.sha256(repr((path, info.st_size, info.st_mtime_ns)).encode()).hexdigest()[:16]
+
+    def get_cache_path(self, path, key):
+        # Cache files are named <file name>-<hash of its folder>-<key>.npy, so calibrations with the same name in
+        # different folders can share a cacheDirectory
+        if self.cacheDirectory is False:
+            return None
+        sourceDirectory = os.path.dirname(os.path.abspath(path))
+        directory = self.cacheDirectory
+        if directory is None:
+            directory = os.path.join(sourceDirectory, '.herrcalibration')
+        directoryHash = hashlib.sha256(sourceDirectory.encode()).hexdigest()[:8]
+        return os.path.join(directory, os.path.basename(path) + '-' + directoryHash + '-' + key + '.npy')
+
+    def write_cache(self, cachePath, edges):
+        # Written to a temporary file then renamed, so another process reading the cache never sees half of it.
+        # Cache files for older versions of the same calibration are removed, which are the ones with the same name
+        # and folder hash and a different key
+        directory, name = os.path.split(cachePath)
+        os.makedirs(directory, exist_ok=True)
+        oldVersion = re.compile(re.escape(name[:name.rindex('-') + 1]) + '[0-9a-f]{16}\\.npy')
+        for oldName in os.listdir(directory):
+            if oldVersion.fullmatch(oldName) and oldName != name:
+                os.remove(os.path.join(directory, oldName))
+        tempPath = cachePath + '.' + str(os.getpid()) + '.tmp'
+        with open(tempPath, 'wb') as cacheFile:
+            np.save(cacheFile, edges)
+        os.replace(tempPath, cachePath)
+
+    def parse(self, path):
+        # Reads the links out of a calibration file, as a list of (qubit1, qubit2, error) then made into edgeType rows
+        if path.lower().endswith('.json'):
+            with open(path) as calibrationFile:
+                links = self.parse_json(json.load(calibrationFile))
+        else:
+            with open(path, newline='') as calibrationFile:
+                links = self.parse_csv(csv.reader(calibrationFile))
+
+        # Average the two directions of each link
+        errors = dict()
+        for qubit1, qubit2, error in links:
+            if qubit1 == qubit2:
+                raise ValueError("Calibration " + str(path) + " has a link from qubit " + str(qubit1) + " to itself")
+            errors.setdefault((min(qubit1, qubit2), max(qubit1, qubit2)), list()).append(error)
+        edges = np.empty(len(errors), dtype=self.edgeType)
+        for row, edge in enumerate(sorted(errors)):
+            edges[row] = (edge[0], edge[1], sum(errors[edge]) / len(errors[edge]))
+        return edges
+
+    def parse_json(self, data):
+        if isinstance(data, dict) and 'gates' in data:
+            # backend.properties().to_dict()
+            links = list()
+            for gate in data['gates']:
+                if gate.get('gate') not in ('cx', 'ecr', 'cz') or len(gate.get('qubits', [])) != 2:
+                    continue
+                for parameter in gate.get('parameters', []):
+                    if parameter.get('name') == 'gate_error':
+                        links.append((int(gate['qubits'][0]), int(gate['qubits'][1]), float(parameter['value'])))
+            return links
+        if isinstance(data, dict):
+            data = data.get('edges')
+        if not isinstance(data, list):
+            raise ValueError("JSON calibrations need a 'gates' list (backend properties) or an 'edges' list")
+        return [(int(qubit1), int(qubit2), float(error)) for qubit1, qubit2, error in data]
+
+    def parse_csv(self, reader):
+        rows = [row for row in reader if len(row) > 0]
+        if len(rows) == 0:
+            return list()
+        header = [column.strip().lower() for column in rows[0]]
+
+        # IBM's calibration download: one row per qubit, with every link's error in one column
+        for column, name in enumerate(header):
+            if name.startswith('cnot error') or name.startswith('cx error') or name.startswith('ecr error'):
+                links = list()
+                for row in rows[1:]:
+                    if column >= len(row):
+                        continue
+                    for entry in row[column].replace(',', ';').split(';'):
+                        if ':' not in entry:
+                            continue
+                        pair, error = entry.split(':')
+                        qubit1, qubit2 = pair.strip().replace('cx', '').split('_')
+                        links.append((int(qubit1), int(qubit2), float(error)))
+                return links
+
+        # qubit1,qubit2,error, with or without the header
+        if 'error' in header:
+            rows = rows[1:]
+        return [(int(row[0]), int(row[1]), float(row[2])) for row in rows]
@@ -0,0 +1,209 @@
+import numpy as np
+import networkx as nx
+
+from qiskit.transpiler.basepasses import AnalysisPass
+from qiskit.transpiler.exceptions import TranspilerError
+from qiskit.transpiler.layout import Layout
+
+
+class HERRLayout(AnalysisPass):
+    """
+    Picks where each qubit of a circuit starts on the device, using the same noise graph as HERR. Qubits that
+    have a lot of two qubit gates between them get put on reliable links next to each other, so HERR has fewer swaps
+    to add. The layout goes in property_set['layout'], and in property_set['herr_layout'] which HERR starts from when
+    it isn't given an initial_layout.
+
+    The cost of a gate between two physical qubits is -log of the accuracy of their link if they are connected,
+    otherwise -log of the most accurate chain of swaps between them (each swap being 3 CNOTs). Placement is greedy:
+    the busiest qubit goes on the physical qubit with the best links, then each next qubit is the one with the most
+    gates to the qubits already placed and goes wherever those gates are cheapest. Refinement then tries swapping
+    each qubit with the physical qubits near it and keeps any swap that lowers the total cost. Gates are weighted
+    by how early they are in the circuit, since HERR moves the qubits around as it routes.
+    """
+
+    def __init__(self, couplingMap, qubitAccuracy, refinementRounds=2, decay=0.1):
+        """
+        Args:
+            couplingMap: Coupling map of the device
+            qubitAccuracy: Noise graph, the same one HERR gets. Each edge's weight is the accuracy of that link
+            refinementRounds: Most times to go over every qubit trying swaps. 0 turns refinement off
+            decay: A gate in the nth layer of two qubit gates counts exp(-decay*n) as much as one in the first layer
+        """
+        super().__init__()
+        self.couplingMap = couplingMap
+        self.qubitAccuracy = qubitAccuracy
+        self.refinementRounds = refinementRounds
+        self.decay = decay
+        self.numPhysical = couplingMap.size()
+
+        # The coupling graph with -log of each link's accuracy on it. swapCost is for a swap, so it's 3 times as much
+        self.costGraph = nx.Graph()
+        self.costGraph.add_nodes_from(range(self.numPhysical))
+        for edge in self.couplingMap.get_edges():
+            if not self.qubitAccuracy.has_edge(edge[0], edge[1]):
+                raise TranspilerError("qubitAccuracy has no weight for coupling map edge " + str(tuple(edge)))
+            weight = self.qubitAccuracy.edges[edge[0], edge[1]]['weight']
+            linkCost = -np.log(max(weight, 1e-12))
+            self.costGraph.add_edge(edge[0], edge[1], linkCost=linkCost, swapCost=3*linkCost)
+        # Gate costs from a physical qubit to every other one, worked out the first time they are needed
+        self.gateCosts = dict()
+
+    def run(self, dag):
+        if dag.num_qubits() > self.numPhysical:
+            raise TranspilerError("Number of qubits greater than device.")
+        placement = self.find_layout(dag)
+        layout = Layout({qubit: placement[i] for i, qubit in enumerate(dag.qubits)})
+        for qreg in dag.qregs.values():
+            layout.add_register(qreg)
+        self.property_set['layout'] = layout
+        # HERR only picks up a layout from the property set when it's this one, see HERR.find_pass_layout
+        self.property_set['herr_layout'] = layout
+
+    def find_layout(self, dag):
+        """
+        Returns the physical qubit each qubit of the circuit starts on, as a list in the order of dag.qubits
+        """
+        interactions = self.interaction_graph(dag)
+        numVirtual = dag.num_qubits()
+        placement = [None] * numVirtual
+        freePhysical = np.ones(self.numPhysical, dtype=bool)
+        linkQuality = self.link_quality()
+
+        # Busiest qubits first, so the qubits that matter most get the first pick
+        busiest = sorted(interactions.nodes, key=lambda virtual: -interactions.degree(virtual, weight='weight'))
+        while True:
+            unplaced = [virtual for virtual in busiest if placement[virtual] is None]
+            if len(unplaced) == 0:
+                break
+            # The qubit with the most gates to ones that are already placed
+            gatesToPlaced = [sum(data['weight'] for neighbor, data in interactions.adj[virtual].items()
+                                 if placement[neighbor] is not None) for virtual in unplaced]
+            virtual = unplaced[int(np.argmax(gatesToPlaced))]
+            if max(gatesToPlaced) == 0:
+                # Nothing to be next to yet, so take the free physical qubit with the best links
+                cost = -linkQuality
+            else:
+                cost = np.zeros(self.numPhysical)
+                for neighbor, data in interactions.adj[virtual].items():
+                    if placement[neighbor] is not None:
+                        cost += data['weight'] * self.get_gate_costs(placement[neighbor])
+            cost[~freePhysical] = np.inf
+            placement[virtual] = int(np.argmin(cost))
+            freePhysical[placement[virtual]] = False
+
+        # Qubits with no two qubit gates just go on whatever is left
+        leftOver = iter(np.flatnonzero(freePhysical).tolist())
+        for virtual in range(numVirtual):
+            if placement[virtual] is None:
+                placement[virtual] = next(leftOver)
+                freePhysical[placement[virtual]] = False
+
+        # The trivial layout gets refined too, and whichever ends up cheaper is used. For circuits where every qubit
+        # talks to every other one the greedy placement doesn't always beat it
+        candidates = [placement, list(range(numVirtual))]
+        best = None
+        for placement in candidates:
+            for refinementRound in range(self.refinementRounds):
+                if not self.refine(placement, interactions):
+                    break
+            cost = self.layout_cost(placement, interactions)
+            if best is None or cost < best[0] - 1e-12:
+                best = (cost, placement)
+        return best[1]
+
+    def layout_cost(self, placement, interactions):
+        # Total cost of the circuit's two qubit gates if its qubits sit on placement
+        cost = 0.0
+        for virtual1, virtual2, weight in interactions.edges(data='weight'):
+            cost += weight * self.get_gate_costs(placement[virtual1])[placement[virtual2]]
+        return cost
+
+    def interaction_graph(self, dag):
+        # Graph of the circuit's qubits (by index) where each edge's weight is how many two qubit gates are between them.
+        # Routing moves qubits around as it goes, so where the qubits start matters most for the first gates
+        qubitIndex = {qubit: i for i, qubit in enumerate(dag.qubits)}
+        interactions = nx.Graph()
+        interactions.add_nodes_from(range(dag.num_qubits()))
+        # Layer each gate is in (counting two qubit gates only), gates get less weight the later they are
+        depth = [0] * dag.num_qubits()
+        for node in dag.topological_op_nodes():
+            if len(node.qargs) == 2 and not getattr(node.op, "_directive", False):
+                qubit1 = qubitIndex[node.qargs[0]]
+                qubit2 = qubitIndex[node.qargs[1]]
+                layer = max(depth[qubit1], depth[qubit2]) + 1
+                depth[qubit1] = depth[qubit2] = layer
+                weight = np.exp(-self.decay * (layer - 1))
+                if interactions.has_edge(qubit1, qubit2):
+                    interactions.edges[qubit1, qubit2]['weight'] += weight
+                else:
+                    interactions.add_edge(qubit1, qubit2, weight=weight)
+        return interactions
+
+    def link_quality(self):
+        # How good a place each physical qubit is to start from: the sum of the accuracies of its links, so qubits with
+        # more links and better ones score higher
+        quality = np.zeros(self.numPhysical)
+        for qubit1, qubit2, linkCost in self.costGraph.edges(data='linkCost'):
+            quality[qubit1] += np.exp(-linkCost)
+            quality[qubit2] += np.exp(-linkCost)
+        return quality
+
+    def get_gate_costs(self, physical):
+        """
+        Returns an array with the cost of a gate between physical and every physical qubit. Connected qubits cost their
+        link, anything further away costs the cheapest chain of swaps between them
+        """
+        if physical not in self.gateCosts:
+            costs = np.full(self.numPhysical, np.inf)
+            for qubit, cost in nx.single_source_dijkstra_path_length(self.costGraph, physical, weight='swapCost').items():
+                costs[qubit] = cost
+            for neighbor, data in self.costGraph.adj[physical].items():
+                costs[neighbor] = data['linkCost']
+            self.gateCosts[physical] = costs
+        return self.gateCosts[physical]
+
+    def refine(self, placement, interactions):
+        """
+        Goes over every qubit of the circuit that has two qubit gates and tries moving it to each physical qubit within
+        two links of where it is now, swapping with whatever qubit is there. Any move that lowers the total cost is kept.
+        Returns True if anything moved
+        """
+        p2v = dict()
+        for virtual, physical in enumerate(placement):
+            p2v[physical] = virtual
+
+        def qubit_cost(virtual, physical, skip=None):
+            # Cost of the gates of virtual if it were on physical, leaving out the gates with skip
+            cost = 0.0
+            for neighbor, data in interactions.adj[virtual].items():
+                if neighbor != skip:
+                    cost += data['weight'] * self.get_gate_costs(physical)[placement[neighbor]]
+            return cost
+
+        moved = False
+        for virtual in interactions.nodes:
+            if interactions.degree(virtual) == 0:
+                continue
+            current = placement[virtual]
+            nearQubits = nx.single_source_shortest_path_length(self.costGraph, current, cutoff=2)
+            for physical in nearQubits:
+                if physical == current:
+                    continue
+                other = p2v.get(physical)
+                before = qubit_cost(virtual, current, other)
+                after = qubit_cost(virtual, physical, other)
+                if other is not None:
+                    # Gates between the two qubits cost the same either way, so they're left out of both sides
+                    before += qubit_cost(other, physical, virtual)
+                    after += qubit_cost(other, current, virtual)
+                if after < before - 1e-12:
+                    placement[virtual] = physical
+                    p2v[physical] = virtual
+                    if other is None:
+                        del p2v[current]
+                    else:
+                        placement[other] = current
+                        p2v[current] = other
+                    current = physical
+                    moved = True
+        return moved
@@ -0,0 +1,82 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from qiskit.transpiler.exceptions import TranspilerError
+
+
+class ReliablePaths:
+    """
+    Most reliable paths between physical qubits, for when HERR moves a qubit the BasicSwap way. Each link costs
+    -3*log(accuracy) to swap over, so the cheapest path is the one whose swaps are the most likely to work. The
+    distances and a predecessor matrix come from Dijkstra's algorithm, after which finding a path is just following
+    predecessors back, which takes as many steps as the path is long.
+
+    A path from qubit1 to qubit2 swaps qubit1 along until it's next to qubit2 and then does the gate, so the last link
+    only counts once (-log(accuracy)) instead of three times. The path is the one that makes the whole thing most
+    accurate, which is how calc_basic_swap_accuracy scores it.
+    """
+
+    def __init__(self, numQubits, uniqueEdges, linkAccuracy, allPairs=True):
+        """
+        Args:
+            numQubits: Number of physical qubits
+            uniqueEdges: Each link once as (qubit1, qubit2), the same as HERR.uniqueEdges
+            linkAccuracy: Accuracy of each link, in the order of uniqueEdges
+            allPairs: Work out every pair up front. Otherwise each qubit's distances are worked out the first time a
+                path starts from it, which is better for big devices where only a few qubits get routed from
+        """
+        edges = np.array(uniqueEdges, dtype=np.int64).reshape(-1, 2)
+        accuracy = np.asarray(linkAccuracy[:len(edges)], dtype=float)
+        # The tiny extra cost per link makes links with an accuracy of 1 still count, so ties go to fewer swaps
+        self.linkCost = -np.log(np.clip(accuracy, 1e-12, 1.0)) + 1e-9
+        self.graph = csr_matrix((3 * self.linkCost, (edges[:, 0], edges[:, 1])), shape=(numQubits, numQubits))
+        # Links of each qubit as (neighbor, cost of a gate on that link)
+        self.neighbors = [list() for qubit in range(numQubits)]
+        for edgeId, (qubit1, qubit2) in enumerate(edges.tolist()):
+            self.neighbors[qubit1].append((qubit2, self.linkCost[edgeId]))
+            self.neighbors[qubit2].append((qubit1, self.linkCost[edgeId]))
+
+        self.rows = dict()
+        # Paths already followed back, by (qubit1, qubit2)
+        self.cachedPaths = dict()
+        self.distances = None
+        self.predecessors = None
+        if allPairs:
+            self.distances, self.predecessors = dijkstra(self.graph, directed=False, return_predecessors=True)
+
+    def get_row(self, source):
+        # Swap cost from source to every qubit, and the qubit before each one on the way there
+        if self.distances is not None:
+            return self.distances[source], self.predecessors[source]
+        if source not in self.rows:
+            distances, predecessors = dijkstra(self.graph, directed=False, indices=source, return_predecessors=True)
+            self.rows[source] = (distances, predecessors)
+        return self.rows[source]
+
+    def path(self, qubit1, qubit2):
+        """
+        Returns the most reliable path from qubit1 to qubit2 as a list of qubits starting with qubit1 and ending with
+        qubit2. Swapping qubit1 down it until the second to last qubit puts it next to qubit2. Callers should not
+        modify the returned list
+        """
+        key = (qubit1, qubit2)
+        if key in self.cachedPaths:
+            return self.cachedPaths[key]
+        distances, predecessors = self.get_row(qubit1)
+        # The qubit next to qubit2 that qubit1 should end up on. Its path never goes through qubit2, since stopping
+        # next to qubit2 on the way would always be cheaper
+        best = None
+        for neighbor, linkCost in self.neighbors[qubit2]:
+            cost = distances[neighbor] + linkCost
+            if best is None or cost < best[0]:
+                best = (cost, neighbor)
+        if best is None or not np.isfinite(best[0]):
+            raise TranspilerError("No path between qubits " + str(qubit1) + " and " + str(qubit2))
+
+        path = [qubit2, best[1]]
+        while path[-1] != qubit1:
+            path.append(int(predecessors[path[-1]]))
+        path.reverse()
+        self.cachedPaths[key] = path
+        return path
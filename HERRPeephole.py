@@ -0,0 +1,160 @@
+from qiskit.circuit.library.standard_gates import CXGate
+from qiskit.dagcircuit import DAGCircuit
+from qiskit.transpiler.basepasses import TransformationPass
+
+
+class HERRPeephole(TransformationPass):
+    """
+    Cleans up the swaps in a routed circuit, meant to run after HERR. Every change gives the exact same circuit, so
+    the qubits still end up where HERR left them:
+
+    1) Two swaps on the same pair of qubits cancel if only single qubit gates are between them. The single qubit
+       gates move to the other qubit, since swap, U on a, swap is the same as U on b. Chains like swap(a,b) swap(b,c)
+       swap(b,c) swap(a,b) cancel all the way down.
+    2) A swap right before or after a CX on the same pair becomes two CXs instead of four, since
+       swap then cx(a,b) is cx(a,b) then cx(b,a).
+
+    This is one pass over the circuit. Each qubit keeps a stack of the gates on it that are still in the circuit, so
+    all the checks only look at the top of the stacks.
+    """
+
+    def __init__(self, couplingMap=None, foldIntoCX=True):
+        """
+        Args:
+            couplingMap: If given, swaps are only folded into CXs on links that can do a CX both ways
+            foldIntoCX: Set to False to only cancel swaps
+        """
+        super().__init__()
+        self.couplingMap = couplingMap
+        self.foldIntoCX = foldIntoCX
+
+    def run(self, dag):
+        # Each gate is [op, qargs, cargs], set to None when it's removed
+        gates = list()
+        stacks = {qubit: list() for qubit in dag.qubits}
+        removedSwaps = 0
+        foldedSwaps = 0
+        if self.couplingMap is not None:
+            qubitIndex = {qubit: i for i, qubit in enumerate(dag.qubits)}
+            couplingEdges = set(tuple(edge) for edge in self.couplingMap.get_edges())
+
+        for node in dag.topological_op_nodes():
+            qargs = list(node.qargs)
+            if self.is_swap(node.op, qargs, node.cargs):
+                earlier = self.find_cancelling_swap(gates, stacks, qargs)
+                if earlier is not None:
+                    self.cancel_swaps(gates, stacks, qargs, earlier)
+                    removedSwaps += 2
+                    continue
+            if self.foldIntoCX and len(qargs) == 2 and (self.couplingMap is None or
+                                                        ((qubitIndex[qargs[0]], qubitIndex[qargs[1]]) in couplingEdges and
+                                                         (qubitIndex[qargs[1]], qubitIndex[qargs[0]]) in couplingEdges)):
+                top = self.shared_top(stacks, qargs)
+                if top is not None and self.fold_into_cx(gates[top], node.op, qargs, node.cargs):
+                    # The gate that was on top is changed in place, and the second half goes on after it
+                    gates.append(gates[top][3])
+                    gates[top] = gates[top][:3]
+                    for qubit in qargs:
+                        stacks[qubit].append(len(gates) - 1)
+                    foldedSwaps += 1
+                    continue
+
+            gates.append([node.op, qargs, list(node.cargs)])
+            for qubit in qargs:
+                stacks[qubit].append(len(gates) - 1)
+
+        new_dag = DAGCircuit()
+        new_dag.name = dag.name
+        new_dag.metadata = dag.metadata
+        for qreg in dag.qregs.values():
+            new_dag.add_qreg(qreg)
+        for creg in dag.cregs.values():
+            new_dag.add_creg(creg)
+        new_dag.global_phase = dag.global_phase
+        for gate in gates:
+            if gate is not None:
+                new_dag.apply_operation_back(gate[0], qargs=gate[1], cargs=gate[2])
+
+        self.property_set['peephole_removed_swaps'] = removedSwaps
+        self.property_set['peephole_folded_swaps'] = foldedSwaps
+        return new_dag
+
+    def is_swap(self, op, qargs, cargs):
+        return op.name == 'swap' and len(qargs) == 2 and len(cargs) == 0 and getattr(op, "condition", None) is None
+
+    def is_cx(self, op, cargs):
+        return op.name == 'cx' and len(cargs) == 0 and getattr(op, "condition", None) is None
+
+    def shared_top(self, stacks, qargs):
+        # Index of the gate on top of both qubits' stacks, if it's the same gate and is only on those two qubits
+        if len(stacks[qargs[0]]) == 0 or len(stacks[qargs[1]]) == 0:
+            return None
+        top = stacks[qargs[0]][-1]
+        if stacks[qargs[1]][-1] != top:
+            return None
+        return top
+
+    def find_cancelling_swap(self, gates, stacks, qargs):
+        """
+        Returns the index of an earlier swap on the same two qubits with only single qubit gates after it on both
+        of them, or None if there isn't one
+        """
+        earlier = list()
+        for qubit in qargs:
+            stack = stacks[qubit]
+            position = len(stack) - 1
+            while position >= 0 and self.is_single_qubit(gates[stack[position]]):
+                position -= 1
+            if position < 0:
+                return None
+            earlier.append(stack[position])
+        if earlier[0] != earlier[1]:
+            return None
+        swap = gates[earlier[0]]
+        if not self.is_swap(swap[0], swap[1], swap[2]) or set(swap[1]) != set(qargs):
+            return None
+        return earlier[0]
+
+    def is_single_qubit(self, gate):
+        # Single qubit gates (including measurements) can move across a swap onto the other qubit. Directives can't
+        return len(gate[1]) == 1 and not getattr(gate[0], "_directive", False)
+
+    def cancel_swaps(self, gates, stacks, qargs, earlier):
+        # Takes out the earlier swap and moves the single qubit gates after it onto the other qubit
+        after = dict()
+        for qubit in qargs:
+            stack = stacks[qubit]
+            position = len(stack) - 1 - self.count_single_qubit_top(gates, stack)
+            after[qubit] = stack[position + 1:]
+            del stack[position:]
+        for qubit, otherQubit in ((qargs[0], qargs[1]), (qargs[1], qargs[0])):
+            for index in after[otherQubit]:
+                gates[index][1] = [qubit]
+            stacks[qubit].extend(after[otherQubit])
+        gates[earlier] = None
+
+    def count_single_qubit_top(self, gates, stack):
+        # How many single qubit gates are on top of a stack
+        count = 0
+        while count < len(stack) and self.is_single_qubit(gates[stack[-1 - count]]):
+            count += 1
+        return count
+
+    def fold_into_cx(self, gate, op, qargs, cargs):
+        """
+        If gate (the gate right before on both qubits) and the new gate are a swap and a CX on the same pair, changes
+        gate into the first of the two CXs that replace them and adds the second as gate[3]. Returns True if it did
+        """
+        if set(gate[1]) != set(qargs):
+            return False
+        if self.is_swap(gate[0], gate[1], gate[2]) and self.is_cx(op, cargs):
+            # swap then cx(c, t) is cx(c, t) then cx(t, c)
+            control, target = qargs
+        elif self.is_cx(gate[0], gate[2]) and self.is_swap(op, qargs, cargs):
+            # cx(c, t) then swap is cx(t, c) then cx(c, t)
+            target, control = gate[1]
+        else:
+            return False
+        gate[0], gate[1], gate[2] = CXGate(), [control, target], []
+        gate.append([CXGate(), [target, control], []])
+        return True
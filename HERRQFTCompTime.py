@@ -1,192 +1,9 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import qiskit
-import HERR
-from qiskit.transpiler import CouplingMap
-from qiskit.transpiler.passes.routing import *
-from qiskit import QuantumCircuit, execute, Aer, IBMQ
-from qiskit.dagcircuit import DAGCircuit
-from qiskit.converters import circuit_to_dag
-from qiskit.converters import dag_to_circuit
-from math import pi
-from qiskit.compiler import transpile, assemble
-from qiskit.providers.aer.noise import NoiseModel
-import qiskit.providers.aer.noise as noise
-from qiskit.tools.visualization import dag_drawer
-import random
-from qiskit.circuit.instruction import Instruction
-import time
-
-
-couplingList = list()
-for i in range(4):
-    for j in range(4):
-        if i is not j:
-            couplingList.append([i, j])
-
-
-provider = IBMQ.load_account()
-backend = provider.get_backend('ibmq_lima')
-
-basis_gates = backend.configuration().basis_gates
-
-couplingMap = CouplingMap(couplingList)
-
-squareCouplingList = list()
-for i in range(4):
-    for j in range(4):
-        if i is not j:
-            if abs(i-j) == 1:
-                squareCouplingList.append([i, j])
-squareCouplingList.append(([0, 3]))
-squareCouplingList.append(([3, 0]))
-squareCouplingMap = CouplingMap(squareCouplingList)
-
-gridCouplingList = list()
-for i in range(4):
-    for j in range(4):
-        if i is not j:
-            if abs(i-j) == 1:
-                gridCouplingList.append([i, j])
-for i in range(4,8):
-    for j in range(4,8):
-        if i is not j:
-            if abs(i-j) == 1:
-                gridCouplingList.append([i, j])
-
-gridCouplingList.append(([0, 4]))
-gridCouplingList.append(([4, 0]))
-gridCouplingList.append(([1, 5]))
-gridCouplingList.append(([5, 1]))
-gridCouplingList.append(([2, 6]))
-gridCouplingList.append(([6, 2]))
-gridCouplingList.append(([3, 7]))
-gridCouplingList.append(([7, 3]))
-gridCouplingMap = CouplingMap(gridCouplingList)
-
-jakatraCouplingList = [[0, 1], [1, 0], [1, 2], [2, 1], [1, 3], [3, 1], [3,5], [5,3], [4,5], [5,4], [6,5], [5,6]]
-jakatraCouplingMap = CouplingMap(jakatraCouplingList)
-
-def qft_rotations(circuit, n):
-    """Performs qft on the first n qubits in circuit (without swaps)"""
-    if n == 0:
-        return circuit
-    n -= 1
-    circuit.h(n)
-    for qubit in range(n):
-        circuit.cp(pi/2**(n-qubit), qubit, n)
-    # At the end of our function, we call the same function again on
-    # the next qubits (we reduced n by one earlier in the function)
-    qft_rotations(circuit, n)
-
-
-def swap_registers(circuit, n):
-    for qubit in range(n//2):
-        circuit.swap(qubit, n-qubit-1)
-    return circuit
-
-
-def qft(circuit, n):
-    """QFT on the first n qubits in circuit"""
-    qft_rotations(circuit, n)
-    swap_registers(circuit, n)
-    return circuit
-
-
-def inverse_qft(circuit, n):
-    """Does the inverse QFT on the first n qubits in circuit"""
-    # First we create a QFT circuit of the correct size:
-    qft_circ = qft(QuantumCircuit(n), n)
-    # Then we take the inverse of this circuit
-    invqft_circ = qft_circ.inverse()
-    # And add it to the first n qubits in our existing circuit
-    circuit.append(invqft_circ, circuit.qubits[:n])
-    return circuit.decompose()  # .decompose() allows us to see the individual gates
-
-def countTwoQubitGates(transpiledCircuit):
-    num = 0
-    for gate in transpiledCircuit.data:
-        # print(type(gate[0]))
-        if issubclass(type(gate[0]), Instruction):
-            if gate[0].name == "cx":
-                num += 1
-    return num
-
-s = '10111011'
-n = len(s)
-# Let's see how it looks:
-circuit = QuantumCircuit(n)
-
-for ii, yesno in enumerate(reversed(s)):
-    if yesno == '1':
-        circuit.x(ii)
-
-
-qft(circuit, n)
-circuit = inverse_qft(circuit, n)
-circuit.measure_all()
-
-circDag = circuit_to_dag(circuit)
-
-targetCouplingMap = gridCouplingMap
-
-bSwap = BasicSwap(targetCouplingMap)
-baseTime = time.perf_counter()
-bSwap.run(circDag)
-bSwapTime = time.perf_counter() - baseTime
-
-sabreSwap = SabreSwap(targetCouplingMap)
-baseTime = time.perf_counter()
-sabreSwap.run(circDag)
-sabreSwapTime = time.perf_counter() - baseTime
-
-stochasticSwap = StochasticSwap(targetCouplingMap)
-baseTime = time.perf_counter()
-stochasticSwap.run(circDag)
-stochasticSwapTime = time.perf_counter() - baseTime
-
-lookAheadSwap = LookaheadSwap(targetCouplingMap)
-baseTime = time.perf_counter()
-lookAheadSwap.run(circDag)
-lookAheadSwapTime = time.perf_counter() - baseTime
-
-
-for i in range(200):
-
-    # Create a noise model for the simulations
-    noise_model = noise.NoiseModel()
-    errorRates = list()
-    qiskitErrors = list()
-
-    for i in range(len(gridCouplingList)//2):
-        errorRates.append(random.randrange(1, 10, 1)/100.0)
-        qiskitErrors.append(noise.depolarizing_error(errorRates[i], 2))
-
-    edges = targetCouplingMap.get_edges()
-    uniqueEdges = set()
-    for edge in edges:
-        uniqueEdges.add(tuple(sorted(edge)))
-    
-    noiseGraph = nx.Graph()
-    noiseGraph.add_nodes_from([0, 7])
-
-    errorIdex = 0
-    for edge in uniqueEdges:
-        noise_model.add_quantum_error(qiskitErrors[errorIdex], ['cx'], edge)
-        noiseGraph.add_edge(edge[0], edge[1], weight=1-errorRates[errorIdex])
-        errorIdex += 1
-
-    herr = HERR.HERR(targetCouplingMap, noiseGraph)
-    basSwap = BasicSwap(targetCouplingMap)
-
-    #print(gridCouplingMap)
-    # Run HERR
-    baseTime = time.perf_counter()
-    HERRRes = herr.run(circDag)
-    HERRSwapTime = time.perf_counter() - baseTime
-    updatedCirc = dag_to_circuit(HERRRes)
-
-    
-    print(str(HERRSwapTime) + " " + str(bSwapTime) + " " + str(sabreSwapTime) + " " + str(stochasticSwapTime) + " " + str(lookAheadSwapTime))
+import HERRBenchmark
 
+"""
+Compilation time benchmark for a QFT then inverse QFT of 10111011 on the 2x4 grid. Each line is the seconds
+HERR, BasicSwap, Sabre, Stochastic and Lookahead took to route it. The benchmark itself is in HERRBenchmark.py
+"""
 
+HERRBenchmark.main(['--family', 'qft', '--size', '8', '--secret', '10111011', '--topology', 'grid', '--mode', 'time',
+                    '--trials', '200', '--routers', 'herr', 'basic', 'sabre', 'stochastic', 'lookahead'])
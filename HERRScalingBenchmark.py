@@ -0,0 +1,56 @@
+import random
+import time
+import networkx as nx
+import HERR
+import CouplingMaps
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler.passes.routing import BasicSwap
+
+"""
+Times HERR on bigger and bigger heavy-hex and grid devices, in the default mode and in scalable mode. The circuits are
+random CNOTs between qubits that are close to each other on the device, which is what a circuit that has been laid
+out well looks like.
+Each line is: device, number of qubits, HERR setup time, HERR routing time, scalable setup time, scalable routing time,
+BasicSwap routing time
+"""
+
+# Number of CNOTs per qubit in each circuit, and how far apart (in links) the two qubits of a CNOT can be
+gatesPerQubit = 2
+gateDistance = 3
+
+devices = list()
+for distance in [3, 5, 7, 9, 15, 21]:
+    devices.append(("heavy-hex d=" + str(distance), CouplingMaps.heavy_hex_coupling_map(distance)))
+for size in [10, 20, 32, 45]:
+    devices.append(("grid " + str(size) + "x" + str(size), CouplingMaps.grid_coupling_map(size, size)))
+
+random.seed(0)
+for name, couplingMap in devices:
+    numQubits = couplingMap.size()
+    couplingGraph = nx.Graph(list(couplingMap.get_edges()))
+
+    circuit = QuantumCircuit(numQubits)
+    for gate in range(gatesPerQubit * numQubits):
+        qubit1 = random.randrange(numQubits)
+        nearQubits = nx.single_source_shortest_path_length(couplingGraph, qubit1, cutoff=gateDistance)
+        qubit2 = random.choice([qubit for qubit in nearQubits if qubit != qubit1])
+        circuit.cx(qubit1, qubit2)
+    circDag = circuit_to_dag(circuit)
+    noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=0)
+
+    times = list()
+    for scalable in [False, True]:
+        baseTime = time.perf_counter()
+        herr = HERR.HERR(couplingMap, noiseGraph, scalable=scalable)
+        times.append(time.perf_counter() - baseTime)
+        baseTime = time.perf_counter()
+        herr.run(circDag)
+        times.append(time.perf_counter() - baseTime)
+
+    bSwap = BasicSwap(couplingMap)
+    baseTime = time.perf_counter()
+    bSwap.run(circDag)
+    times.append(time.perf_counter() - baseTime)
+
+    print(name + " " + str(numQubits) + " " + " ".join(str(t) for t in times))
@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.transpiler import CouplingMap
+
+import HERR
+import HERRCalibration
+
+"""
+A local routing server, so programs that route a lot of circuits don't each pay for starting python, importing qiskit
+and setting up HERR. Clients connect over TCP and send one JSON object per line, and get one JSON object per line back:
+
+    {"op": "device", "couplingMap": [[0, 1], [1, 0], ...], "noise": [[0, 1, 0.98], ...], "options": {"searchDepth": 2}}
+        Registers a device and returns {"device": key}. Instead of "noise" it can have "calibration", the path of a
+        calibration file HERRCalibration can read, relative to the server's calibration folder (--calibration-dir).
+        Calibrations outside that folder are refused, and without one only "noise" can be used. "options" are passed
+        on to HERR. The server remembers the devices used most recently (--max-devices), routing on one it has
+        forgotten gives an error and it has to be registered again, which gives the same key
+    {"op": "route", "device": key, "qasm": "OPENQASM 2.0; ...", "layout": [2, 0, 1], "id": 7}
+        Routes a circuit on the device and returns {"id": 7, "qasm": ..., "successProbability": ..., "degradedGates": ...}.
+        "layout" (the physical qubit of each qubit of the circuit) and "id" are optional, "id" is just handed back
+    {"op": "ping"}
+        Returns {"ok": true}
+
+Anything that goes wrong comes back as {"id": ..., "error": message}. Requests on one connection are handled at the
+same time, so their responses can come back in a different order, which is what "id" is for.
+
+Routing runs on a pool of worker processes. Each worker keeps the HERR objects it has set up (its warm contexts) for
+the devices it has routed on, so only the first circuit on a device in each worker pays for the set up. Workers are
+only sent the device's key, and the whole device only when the one that got the circuit doesn't have it yet.
+
+Run it with: python HERRServer.py --port 8765 --workers 4 --calibration-dir ~/calibrations
+"""
+
+# HERR options a client is allowed to set
+deviceOptions = ('searchDepth', 'parallelLayers', 'beamWidth', 'lookahead', 'scalable', 'timeBudget', 'reduceDepthAt',
+                 'reliablePaths')
+
+# The warm HERR objects of a worker process, by device key, least recently used first
+workerContexts = OrderedDict()
+workerMaxContexts = 16
+
+
+def init_worker(maxContexts):
+    global workerMaxContexts
+    workerMaxContexts = maxContexts
+
+
+def build_context(device):
+    # Makes the HERR object for a device and works out everything about its coupling map up front
+    couplingMap = CouplingMap([list(edge) for edge in device['couplingMap']])
+    if 'calibration' in device:
+        noiseGraph = HERRCalibration.CalibrationLoader().noise_graph(device['calibration'], couplingMap)
+    else:
+        noiseGraph = nx.Graph()
+        noiseGraph.add_nodes_from(couplingMap.physical_qubits)
+        for qubit1, qubit2, accuracy in device['noise']:
+            noiseGraph.add_edge(int(qubit1), int(qubit2), weight=float(accuracy))
+    herr = HERR.HERR(couplingMap, noiseGraph, **device.get('options', {}))
+    herr.prepare()
+    return herr
+
+
+def get_context(key, device):
+    if key in workerContexts:
+        workerContexts.move_to_end(key)
+    else:
+        workerContexts[key] = build_context(device)
+        if len(workerContexts) > workerMaxContexts:
+            workerContexts.popitem(last=False)
+    return workerContexts[key]
+
+
+def check_calibration(path, couplingList):
+    # Reads a calibration once so a bad file is reported when the device is registered, this also fills the
+    # calibration cache for the workers. Returns the calibration's version
+    loader = HERRCalibration.CalibrationLoader()
+    loader.noise_graph(path, CouplingMap(couplingList))
+    return loader.make_key(path)
+
+
+def route_in_worker(key, device, qasm, layout):
+    # Routes one circuit in a worker process. Returns the routed circuit as QASM, its predicted success probability
+    # and how many gates were routed after running out of time. device is None when the server is hoping this worker
+    # already has the device's context, if it doesn't this returns None so the server can send the device
+    if device is None and key not in workerContexts:
+        return None
+    herr = get_context(key, device)
+    dag = circuit_to_dag(QuantumCircuit.from_qasm_str(qasm))
+    herr.initial_layout = layout
+    try:
+        new_dag = herr.run(dag)
+    finally:
+        herr.initial_layout = None
+    return (dag_to_circuit(new_dag).qasm(), herr.property_set['herr_success_probability'],
+            herr.property_set['herr_degraded_gates'])
+
+
+class RoutingServer:
+    """
+    asyncio server that takes routing requests and runs them on a process pool. See the top of this file for the
+    protocol
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=None, maxContexts=16, calibrationDirectory=None,
+                 maxDevices=1024):
+        """
+        Args:
+            host: Address to listen on. The default only takes connections from this machine
+            port: Port to listen on, 0 picks a free one
+            workers: Number of worker processes, defaults to the number of CPUs
+            maxContexts: Most devices each worker keeps a HERR object for
+            calibrationDirectory: Folder clients can use calibration files from. None means clients can't use
+                calibration files at all, only "noise"
+            maxDevices: Most registered devices kept, the least recently used one is forgotten after that
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.maxContexts = maxContexts
+        if calibrationDirectory is not None:
+            calibrationDirectory = os.path.realpath(calibrationDirectory)
+        self.calibrationDirectory = calibrationDirectory
+        # Devices that have been registered, by key, least recently used first
+        self.devices = OrderedDict()
+        self.maxDevices = maxDevices
+        self.pool = None
+        self.server = None
+
+    async def start(self):
+        # The pool starts its workers as it needs them, and forked ones would keep a copy of every client connection
+        # open at the time, so a connection the server closes wouldn't end until the worker did. Spawned ones start clean
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_worker, initargs=(self.maxContexts,))
+        # Circuits can be big, so lines of up to 64MB are allowed
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port, limit=1 << 26)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info("HERR server listening on %s:%d with %d workers", self.host, self.port, self.workers)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        tasks = set()
+        writeLock = asyncio.Lock()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.handle_line(line, writer, writeLock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line, writer, writeLock):
+        requestId = None
+        try:
+            request = json.loads(line)
+            requestId = request.get('id')
+            response = await self.handle_request(request)
+        except Exception as error:
+            response = {'error': type(error).__name__ + ": " + str(error)}
+        if requestId is not None:
+            response['id'] = requestId
+        async with writeLock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def handle_request(self, request):
+        op = request.get('op')
+        if op == 'route':
+            if request.get('device') not in self.devices:
+                raise ValueError("Unknown device, register it with a 'device' request first")
+            key = request['device']
+            device = self.devices[key]
+            self.devices.move_to_end(key)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, route_in_worker, key, None, request['qasm'],
+                                                request.get('layout'))
+            if result is None:
+                # The worker that got it hasn't set up this device yet
+                result = await loop.run_in_executor(self.pool, route_in_worker, key, device, request['qasm'],
+                                                    request.get('layout'))
+            qasm, successProbability, degradedGates = result
+            return {'qasm': qasm, 'successProbability': successProbability, 'degradedGates': degradedGates}
+        if op == 'device':
+            return {'device': await self.register_device(request)}
+        if op == 'ping':
+            return {'ok': True}
+        raise ValueError("Unknown op " + repr(op))
+
+    async def register_device(self, request):
+        """
+        Checks a device request and returns its key. The same device with the same noise and options always gets
+        the same key, so clients can register it every time they start
+        """
+        device = {'couplingMap': [[int(qubit1), int(qubit2)] for qubit1, qubit2 in request['couplingMap']]}
+        if 'calibration' in request:
+            device['calibration'] = self.find_calibration(request['calibration'])
+            # Parsing a big calibration takes a while, so it's done off the event loop to keep other requests going
+            loop = asyncio.get_running_loop()
+            device['calibrationVersion'] = await loop.run_in_executor(
+                None, check_calibration, device['calibration'], device['couplingMap'])
+        elif 'noise' in request:
+            device['noise'] = [[int(qubit1), int(qubit2), float(accuracy)] for qubit1, qubit2, accuracy in request['noise']]
+        else:
+            raise ValueError("A device needs 'noise' or 'calibration'")
+        options = request.get('options', {})
+        for option in options:
+            if option not in deviceOptions:
+                raise ValueError("Unknown HERR option " + repr(option))
+        device['options'] = options
+
+        key = hashlib.sha256(json.dumps(device, sort_keys=True).encode()).hexdigest()[:16]
+        self.devices[key] = device
+        self.devices.move_to_end(key)
+        while len(self.devices) > self.maxDevices:
+            self.devices.popitem(last=False)
+        return key
+
+    def find_calibration(self, path):
+        # Resolves a client's calibration path inside the calibration folder. Links are followed first, so neither
+        # '..' nor a link can get to a file outside it
+        if self.calibrationDirectory is None:
+            raise ValueError("This server doesn't take calibration files, start it with --calibration-dir to allow them")
+        fullPath = os.path.realpath(os.path.join(self.calibrationDirectory, str(path)))
+        if os.path.commonpath([fullPath, self.calibrationDirectory]) != self.calibrationDirectory:
+            raise ValueError("Calibration " + repr(path) + " is outside the calibration folder")
+        if not os.path.isfile(fullPath):
+            raise ValueError("No calibration file " + repr(path))
+        return fullPath
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local HERR routing server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-contexts', type=int, default=16)
+    parser.add_argument('--max-devices', type=int, default=1024)
+    parser.add_argument('--calibration-dir', default=None,
+                        help="Folder clients can use calibration files from, without it they can only send noise")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = RoutingServer(args.host, args.port, args.workers, args.max_contexts, args.calibration_dir,
+                           args.max_devices)
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+import CouplingMaps
+from qiskit import QuantumCircuit
+
+"""
+Load generator for HERRServer.py. Starts a server on this machine, registers a device and sends it random circuits
+from several clients at once, then prints the throughput and the p50/p99 latency of the requests.
+Run it with: python HERRServerBenchmark.py [workers] [clients] [requests]
+"""
+
+port = 8766
+workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+numRequests = int(sys.argv[3]) if len(sys.argv) > 3 else 400
+# The circuits are random CNOTs (with some single qubit gates) on all the qubits of a 5x5 grid
+rows, columns = 5, 5
+numGates = 60
+numCircuits = 50
+
+
+def make_circuits():
+    random.seed(0)
+    circuits = list()
+    numQubits = rows * columns
+    for c in range(numCircuits):
+        circuit = QuantumCircuit(numQubits, numQubits)
+        for gate in range(numGates):
+            qubit1, qubit2 = random.sample(range(numQubits), 2)
+            circuit.h(qubit1)
+            circuit.cx(qubit1, qubit2)
+        circuit.measure(range(numQubits), range(numQubits))
+        circuits.append(circuit.qasm())
+    return circuits
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+    return response
+
+
+async def connect():
+    # Waits for the server to start listening
+    for attempt in range(600):
+        try:
+            return await asyncio.open_connection('127.0.0.1', port, limit=1 << 26)
+        except ConnectionError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server didn't start")
+
+
+async def client(device, circuits, requestQueue, latencies):
+    reader, writer = await connect()
+    while not requestQueue.empty():
+        index = requestQueue.get_nowait()
+        startTime = time.perf_counter()
+        await request(reader, writer, {'op': 'route', 'device': device, 'qasm': circuits[index % len(circuits)], 'id': index})
+        latencies.append(time.perf_counter() - startTime)
+    writer.close()
+
+
+async def run_load():
+    circuits = make_circuits()
+    couplingMap = CouplingMaps.grid_coupling_map(rows, columns)
+    noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=0)
+    reader, writer = await connect()
+    device = (await request(reader, writer, {
+        'op': 'device', 'couplingMap': [list(edge) for edge in couplingMap.get_edges()],
+        'noise': [[qubit1, qubit2, weight] for qubit1, qubit2, weight in noiseGraph.edges(data='weight')]}))['device']
+
+    # Warm up every worker first, so the numbers are for warm contexts
+    await asyncio.gather(*[client(device, circuits, queue_of(range(workers * 4)), list()) for c in range(workers)])
+
+    latencies = list()
+    startTime = time.perf_counter()
+    await asyncio.gather(*[client(device, circuits, requestQueue, latencies)
+                           for requestQueue in [queue_of(range(numRequests))] for c in range(clients)])
+    totalTime = time.perf_counter() - startTime
+    writer.close()
+
+    latencies = np.array(latencies) * 1000
+    print("workers " + str(workers) + " clients " + str(clients) + " requests " + str(numRequests))
+    print("throughput " + str(round(numRequests / totalTime, 1)) + " circuits/s")
+    print("latency p50 " + str(round(np.percentile(latencies, 50), 2)) + " ms, p99 " +
+          str(round(np.percentile(latencies, 99), 2)) + " ms, max " + str(round(latencies.max(), 2)) + " ms")
+
+
+def queue_of(items):
+    requestQueue = asyncio.Queue()
+    for item in items:
+        requestQueue.put_nowait(item)
+    return requestQueue
+
+
+if __name__ == '__main__':
+    server = subprocess.Popen([sys.executable, 'HERRServer.py', '--port', str(port), '--workers', str(workers)])
+    try:
+        asyncio.run(run_load())
+    finally:
+        server.terminate()
+        server.wait()
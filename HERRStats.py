@@ -0,0 +1,153 @@
+import time
+
+
+class RoutingStats:
+    """
+    Counters and timers for HERR.run, for finding out where routing time goes. Give one to HERR as stats=RoutingStats()
+    and every run adds to it. The numbers are also put in property_set['herr_stats'] after each run, and report()
+    gives them as a table.
+
+    The timers work by wrapping HERR's methods on the HERR object for the length of a run, so with no stats object
+    nothing is wrapped and routing runs exactly as fast as normal. times includes the time of anything the method
+    calls, so find_better_link includes the find_shortest_path calls it makes. selfTimes leaves out the time spent in
+    the other timers, so the self time of 'routing' is the time spent walking the layers of the circuit. One stats
+    object can be shared by many HERR objects, the same as a routing cache.
+    """
+
+    # HERR methods that get timed, and the name of their timer
+    timedMethods = {
+        'route_state': 'routing',
+        'find_better_link': 'find_better_link',
+        'find_route_options': 'find_route_options',
+        'find_shortest_path': 'find_shortest_path',
+        'find_path_excluding': 'find_path_excluding',
+        'score_candidates': 'score_candidates',
+    }
+
+    def __init__(self):
+        # Seconds spent in each timer, the same without the timers inside it, and how many times it was entered
+        self.times = dict()
+        self.selfTimes = dict()
+        self.calls = dict()
+        # The timers that are running, each is [name, seconds spent in timers inside it]
+        self.running = list()
+        # Everything else that gets counted, like swaps and candidates
+        self.counts = dict()
+        self.runs = 0
+        self.snapshot = None
+
+    def add_time(self, name, seconds, selfSeconds=None):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+        self.selfTimes[name] = self.selfTimes.get(name, 0.0) + (seconds if selfSeconds is None else selfSeconds)
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def timed_call(self, name, function, *args, **kwargs):
+        # Calls function, adding the time it takes to the name timer
+        timer = [name, 0.0]
+        self.running.append(timer)
+        startTime = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - startTime
+            self.running.pop()
+            if len(self.running) > 0:
+                self.running[-1][1] += seconds
+            self.add_time(name, seconds, seconds - timer[1])
+
+    def add_count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def record(self, herr, function, *args):
+        """
+        Calls function (one of herr's methods) with everything recorded, and returns what it does
+        """
+        self.start(herr)
+        try:
+            return self.timed_call('run', function, *args)
+        finally:
+            self.stop(herr)
+
+    def start(self, herr):
+        """
+        Starts recording a run of herr: wraps its methods and remembers how big its caches are so the number of new
+        entries can be worked out at the end
+        """
+        self.snapshot = (len(herr.candidateTables), len(herr.excludedPaths), len(herr.basicPaths),
+                         herr.cache.hits if herr.cache is not None else 0,
+                         herr.cache.misses if herr.cache is not None else 0)
+        for method, name in self.timedMethods.items():
+            self.wrap(herr, method, name)
+        self.wrap_state(herr)
+
+    def stop(self, herr):
+        # Takes the wrappers off herr and adds up the counts for the run
+        for method in list(self.timedMethods) + ['new_routing_state']:
+            herr.__dict__.pop(method, None)
+        tables, paths, basicPaths, hits, misses = self.snapshot
+        self.add_count('candidate tables built', len(herr.candidateTables) - tables)
+        self.add_count('paths computed', len(herr.excludedPaths) - paths + len(herr.basicPaths) - basicPaths)
+        if herr.cache is not None:
+            self.add_count('routing cache hits', herr.cache.hits - hits)
+            self.add_count('routing cache misses', herr.cache.misses - misses)
+        self.runs += 1
+        self.snapshot = None
+
+    def wrap(self, herr, method, name):
+        # Puts a timed version of one of herr's methods on the object itself, which is found before the class's method
+        original = getattr(herr, method)
+
+        def timed(*args, **kwargs):
+            return self.timed_call(name, original, *args, **kwargs)
+
+        if method == 'score_candidates':
+            def timed_scores(*args, **kwargs):
+                scores = timed(*args, **kwargs)
+                self.add_count('candidates scored', scores.size)
+                return scores
+            setattr(herr, method, timed_scores)
+        else:
+            setattr(herr, method, timed)
+
+    def wrap_state(self, herr):
+        # Times adding swaps and gates to the output DAG (and counts the swaps) on every RoutingState herr makes
+        newRoutingState = herr.new_routing_state
+
+        def new_routing_state(*args, **kwargs):
+            state = newRoutingState(*args, **kwargs)
+            swap = state.swap
+            applyGate = state.apply_gate
+
+            def timed_swap(physical1, physical2):
+                self.timed_call('dag', swap, physical1, physical2)
+                self.add_count('swaps')
+
+            def timed_apply_gate(node):
+                self.timed_call('dag', applyGate, node)
+
+            state.swap = timed_swap
+            state.apply_gate = timed_apply_gate
+            return state
+
+        herr.new_routing_state = new_routing_state
+
+    def as_dict(self):
+        # Returns everything recorded as a dictionary
+        return {'runs': self.runs, 'times': dict(self.times), 'selfTimes': dict(self.selfTimes),
+                'calls': dict(self.calls), 'counts': dict(self.counts)}
+
+    def report(self):
+        # The stats as text, slowest timer first
+        lines = ["HERR stats over " + str(self.runs) + " runs", "  %-20s %11s %11s %10s" % ("timer", "total", "self", "calls")]
+        for name, seconds in sorted(self.times.items(), key=lambda item: -item[1]):
+            lines.append("  %-20s %10.4fs %10.4fs %10d" % (name, seconds, self.selfTimes[name], self.calls[name]))
+        for name, count in self.counts.items():
+            lines.append("  %-30s %10d" % (name, count))
+        return "\n".join(lines)
+
+    def reset(self):
+        self.times.clear()
+        self.selfTimes.clear()
+        self.calls.clear()
+        self.counts.clear()
+        self.runs = 0
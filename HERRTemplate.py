@@ -0,0 +1,117 @@
+import functools
+
+from qiskit.circuit import ParameterExpression
+from qiskit.circuit.parametervector import ParameterVectorElement
+from qiskit.dagcircuit import DAGCircuit
+from qiskit.transpiler.exceptions import TranspilerError
+
+
+class RoutingTemplate:
+    """
+    A routed circuit with parameters left in it, made by HERR.route_template. HERR's choices only depend on which
+    qubits the two qubit gates are on and on the noise, never on the angles, so a parameterized circuit can be routed
+    once and then have values bound to it as many times as needed. Binding doesn't route anything, it goes over the
+    routed gates once and swaps in the values, so it costs time linear in the number of gates.
+    """
+
+    def __init__(self, routedDag, successProbability):
+        """
+        Args:
+            routedDag: The routed DAG, still with its parameters in it
+            successProbability: Predicted success probability of the routed circuit, which doesn't depend on the values
+        """
+        self.name = routedDag.name
+        self.metadata = routedDag.metadata
+        self.qregs = list(routedDag.qregs.values())
+        self.cregs = list(routedDag.cregs.values())
+        self.globalPhase = routedDag.global_phase
+        self.successProbability = successProbability
+        # Every gate of the routed circuit as [op, qargs, cargs], and the position of the ones that have parameters
+        self.gates = list()
+        self.parameterizedGates = list()
+        parameters = set()
+        for node in routedDag.topological_op_nodes():
+            if any(isinstance(param, ParameterExpression) for param in node.op.params):
+                self.parameterizedGates.append(len(self.gates))
+                for param in node.op.params:
+                    if isinstance(param, ParameterExpression):
+                        parameters.update(param.parameters)
+            self.gates.append((node.op, node.qargs, node.cargs))
+        if isinstance(self.globalPhase, ParameterExpression):
+            parameters.update(self.globalPhase.parameters)
+        # In the same order as QuantumCircuit.parameters, so values can be given as a list the same way
+        self.parameters = sorted(parameters, key=functools.cmp_to_key(compare_parameters))
+
+    def bind(self, values):
+        """
+        Returns the routed DAG with values put in for the parameters
+
+        Args:
+            values: Dictionary from each Parameter to its value, or a list of values in the order of self.parameters
+        """
+        if not isinstance(values, dict):
+            values = list(values)
+            if len(values) != len(self.parameters):
+                raise TranspilerError("Expected " + str(len(self.parameters)) + " values but got " + str(len(values)))
+            values = dict(zip(self.parameters, values))
+        else:
+            missing = [parameter.name for parameter in self.parameters if parameter not in values]
+            if len(missing) > 0:
+                raise TranspilerError("No value for parameters " + ", ".join(missing))
+
+        new_dag = DAGCircuit()
+        new_dag.name = self.name
+        new_dag.metadata = self.metadata
+        for qreg in self.qregs:
+            new_dag.add_qreg(qreg)
+        for creg in self.cregs:
+            new_dag.add_creg(creg)
+        new_dag.global_phase = self.bind_value(self.globalPhase, values)
+
+        # Gates without parameters are shared with the template, the same as copy_dag does
+        ops = [gate[0] for gate in self.gates]
+        for index in self.parameterizedGates:
+            op = ops[index].copy()
+            op.params = [self.bind_value(param, values) for param in op.params]
+            self.bind_definition(op, values)
+            ops[index] = op
+        for op, gate in zip(ops, self.gates):
+            new_dag.apply_operation_back(op, qargs=gate[1], cargs=gate[2])
+        return new_dag
+
+    def bind_many(self, valueSets):
+        # bind for each set of values, in order
+        return [self.bind(values) for values in valueSets]
+
+    def bind_definition(self, op, values):
+        # Custom gates (like ones made with to_gate) carry their parameters in their definition as well, which
+        # QuantumCircuit.assign_parameters binds along with the gate's own parameters, so this does the same. op is
+        # already a copy, and copying a gate copies its definition, so it can be changed in place
+        if not op._definition:
+            return
+        for instruction in op._definition:
+            inner = instruction.operation
+            if any(isinstance(param, ParameterExpression) for param in inner.params):
+                inner.params = [self.bind_value(param, values) for param in inner.params]
+                self.bind_definition(inner, values)
+
+    def bind_value(self, param, values):
+        # Puts the values into one parameter of a gate. If nothing is left unbound it becomes a number like
+        # QuantumCircuit.assign_parameters gives
+        if not isinstance(param, ParameterExpression):
+            return param
+        bound = param.bind({parameter: values[parameter] for parameter in param.parameters if parameter in values})
+        if len(bound.parameters) > 0:
+            return bound
+        number = complex(bound)
+        return number.real if number.imag == 0 else number
+
+
+def compare_parameters(parameter1, parameter2):
+    # The order QuantumCircuit.parameters uses: by name, except elements of the same ParameterVector go by index
+    if isinstance(parameter1, ParameterVectorElement) and isinstance(parameter2, ParameterVectorElement) and \
+            parameter1.vector.name == parameter2.vector.name:
+        key1, key2 = parameter1.index, parameter2.index
+    else:
+        key1, key2 = parameter1.name, parameter2.name
+    return (key1 > key2) - (key1 < key2)
@@ -0,0 +1,61 @@
+import random
+
+from qiskit import QuantumCircuit
+from qiskit.dagcircuit import DAGCircuit
+
+"""
+Circuits and helpers the tests share
+"""
+
+
+def random_circuit(numQubits, numGates, seed):
+    # Random H and CX gates over every qubit of the device, which is the kind of circuit HERRReference can route
+    rng = random.Random(seed)
+    circuit = QuantumCircuit(numQubits, numQubits)
+    for gate in range(numGates):
+        if rng.random() < 0.3:
+            circuit.h(rng.randrange(numQubits))
+        else:
+            qubit1, qubit2 = rng.sample(range(numQubits), 2)
+            circuit.cx(qubit1, qubit2)
+    circuit.measure(range(numQubits), range(numQubits))
+    return circuit
+
+
+def check_routing(dag, routedDag, couplingMap, layout=None):
+    """
+    Undoes the swaps a router added and returns (same circuit, every two qubit gate on a link). The first is True if
+    what's left is the input circuit again, with each gate back on the qubit it started on
+
+    Args:
+        dag: The input DAG
+        routedDag: The routed DAG, on physical qubits
+        couplingMap: The coupling map it was routed for
+        layout: The physical qubit each qubit of dag started on, the trivial layout by default
+    """
+    # Routers put the input's own gates on the routed DAG, so a swap that isn't one of them was added by the router
+    inputOps = {id(node.op) for node in dag.op_nodes()}
+    wires = {qubit: index for index, qubit in enumerate(routedDag.qubits)}
+    if layout is None:
+        layout = list(range(couplingMap.size()))
+    p2v = [None] * couplingMap.size()
+    for virtual, physical in enumerate(layout):
+        p2v[physical] = virtual
+    links = set(tuple(edge) for edge in couplingMap.get_edges())
+
+    unrouted = DAGCircuit()
+    for qreg in dag.qregs.values():
+        unrouted.add_qreg(qreg)
+    for creg in dag.cregs.values():
+        unrouted.add_creg(creg)
+    unrouted.global_phase = dag.global_phase
+    onLinks = True
+    for node in routedDag.topological_op_nodes():
+        physical = [wires[qubit] for qubit in node.qargs]
+        if len(physical) == 2 and node.op.name != 'barrier' and tuple(physical) not in links:
+            onLinks = False
+        if id(node.op) not in inputOps and node.op.name == 'swap':
+            p2v[physical[0]], p2v[physical[1]] = p2v[physical[1]], p2v[physical[0]]
+        else:
+            unrouted.apply_operation_back(node.op, [dag.qubits[p2v[qubit]] for qubit in physical], node.cargs)
+    return unrouted == dag, onLinks
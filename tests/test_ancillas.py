@@ -0,0 +1,41 @@
+import unittest
+
+from qiskit import QuantumCircuit, QuantumRegister
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+
+import CouplingMaps
+import HERR
+from RoutingCases import check_routing
+
+"""
+Checks that HERR adds the physical qubits a circuit doesn't use as an ancilla register when swaps go through them
+"""
+
+
+class TestAncillas(unittest.TestCase):
+
+    def route(self, qreg):
+        # Three qubits spread over a line of six, so the swaps between them go through qubits with no wire yet
+        couplingMap = CouplingMap.from_line(6)
+        circuit = QuantumCircuit(qreg)
+        circuit.cx(0, 1)
+        circuit.cx(1, 2)
+        circuit.cx(0, 2)
+        dag = circuit_to_dag(circuit)
+        routed = HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap), initial_layout=[0, 5, 2]).run(dag)
+        self.assertEqual(check_routing(dag, routed, couplingMap, [0, 5, 2, 1, 3, 4]), (True, True))
+        return routed
+
+    def test_ancilla_register(self):
+        routed = self.route(QuantumRegister(3, 'q'))
+        self.assertEqual(list(routed.qregs), ['q', 'ancilla'])
+
+    def test_circuit_has_an_ancilla_register(self):
+        routed = self.route(QuantumRegister(3, 'ancilla'))
+        self.assertEqual(list(routed.qregs), ['ancilla', 'ancilla1'])
+        self.assertEqual(routed.qregs['ancilla1'].size, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+
+import CouplingMaps
+import HERR
+import HERRCache
+from RoutingCases import random_circuit
+
+"""
+Checks that HERRCache.RoutingCache hands back what HERR routed, and doesn't hand back entries from an older cacheVersion
+"""
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.couplingMap = CouplingMap.from_grid(3, 3)
+        self.noiseGraph = CouplingMaps.random_noise_graph(self.couplingMap, seed=0)
+        self.dag = circuit_to_dag(random_circuit(9, 40, 0))
+        self.expected = HERR.HERR(self.couplingMap, self.noiseGraph).run(self.dag)
+
+    def test_hit_same_as_routing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            HERR.HERR(self.couplingMap, self.noiseGraph, cache=HERRCache.RoutingCache(directory=directory)).run(self.dag)
+            # A new cache on the same folder only has the file to go on
+            cache = HERRCache.RoutingCache(directory=directory)
+            self.assertEqual(HERR.HERR(self.couplingMap, self.noiseGraph, cache=cache).run(self.dag), self.expected)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_old_version_missed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            HERR.HERR(self.couplingMap, self.noiseGraph, cache=HERRCache.RoutingCache(directory=directory)).run(self.dag)
+            cache = HERRCache.RoutingCache(directory=directory)
+            with mock.patch.object(HERRCache, 'cacheVersion', HERRCache.cacheVersion + 1):
+                self.assertEqual(HERR.HERR(self.couplingMap, self.noiseGraph, cache=cache).run(self.dag), self.expected)
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
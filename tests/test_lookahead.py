@@ -0,0 +1,42 @@
+import unittest
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+from qiskit.transpiler.exceptions import TranspilerError
+
+import BenchmarkCircuits
+import CouplingMaps
+import HERR
+from RoutingCases import check_routing, random_circuit
+
+"""
+Checks the beam search mode (HERR(..., lookahead=n)) gives correctly routed circuits
+"""
+
+
+class TestLookahead(unittest.TestCase):
+
+    def test_routes_correctly(self):
+        cases = [(CouplingMaps.grid_coupling_map(2, 4), BenchmarkCircuits.make_circuit('qft', 8)[0]),
+                 (CouplingMap.from_grid(4, 4), random_circuit(16, 120, 1)),
+                 (CouplingMaps.heavy_hex_coupling_map(3), random_circuit(19, 120, 2))]
+        for index, (couplingMap, circuit) in enumerate(cases):
+            dag = circuit_to_dag(circuit)
+            for seed in range(2):
+                noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=seed)
+                for lookahead, beamWidth in ((1, 1), (2, 2), (3, 3)):
+                    with self.subTest(case=index, seed=seed, lookahead=lookahead, beamWidth=beamWidth):
+                        herr = HERR.HERR(couplingMap, noiseGraph, lookahead=lookahead, beamWidth=beamWidth)
+                        self.assertEqual(check_routing(dag, herr.run(dag), couplingMap), (True, True))
+
+    def test_bad_settings(self):
+        couplingMap = CouplingMap.from_line(4)
+        noiseGraph = CouplingMaps.random_noise_graph(couplingMap)
+        with self.assertRaises(TranspilerError):
+            HERR.HERR(couplingMap, noiseGraph, lookahead=2, beamWidth=0)
+        with self.assertRaises(TranspilerError):
+            HERR.HERR(couplingMap, noiseGraph, lookahead=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+from qiskit.transpiler.exceptions import TranspilerError
+
+import BenchmarkCircuits
+import CouplingMaps
+import HERR
+from RoutingCases import check_routing, random_circuit
+
+"""
+Checks HERR(..., parallelLayers=True) gives correctly routed circuits
+"""
+
+
+class TestParallelLayers(unittest.TestCase):
+
+    def test_routes_correctly(self):
+        cases = [(CouplingMaps.grid_coupling_map(2, 4), BenchmarkCircuits.make_circuit('bv', 7)[0]),
+                 (CouplingMap.from_grid(4, 4), random_circuit(16, 120, 1)),
+                 (CouplingMaps.heavy_hex_coupling_map(3), random_circuit(19, 120, 2))]
+        for index, (couplingMap, circuit) in enumerate(cases):
+            dag = circuit_to_dag(circuit)
+            for seed in range(3):
+                for searchDepth in (1, 2):
+                    with self.subTest(case=index, seed=seed, searchDepth=searchDepth):
+                        herr = HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap, seed=seed),
+                                         searchDepth=searchDepth, parallelLayers=True)
+                        self.assertEqual(check_routing(dag, herr.run(dag), couplingMap), (True, True))
+
+    def test_no_lookahead(self):
+        couplingMap = CouplingMap.from_line(4)
+        with self.assertRaises(TranspilerError):
+            HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap), parallelLayers=True, lookahead=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.quantum_info import Operator
+
+import CouplingMaps
+import HERR
+import HERRPeephole
+from RoutingCases import random_circuit
+
+"""
+Checks that HERRPeephole never changes what a circuit does, by comparing the unitaries before and after
+"""
+
+
+def same_unitary(circuit, newCircuit):
+    circuit = circuit.remove_final_measurements(inplace=False)
+    newCircuit = newCircuit.remove_final_measurements(inplace=False)
+    return Operator(circuit).equiv(Operator(newCircuit))
+
+
+class TestPeephole(unittest.TestCase):
+
+    def test_random_swap_circuits(self):
+        # Lots of swaps next to each other and to CXs, so every rule gets used
+        rng = random.Random(0)
+        for trial in range(100):
+            circuit = QuantumCircuit(4)
+            for gate in range(12):
+                kind = rng.random()
+                qubit1, qubit2 = rng.sample(range(4), 2)
+                if kind < 0.4:
+                    circuit.swap(qubit1, qubit2)
+                elif kind < 0.7:
+                    circuit.cx(qubit1, qubit2)
+                elif kind < 0.85:
+                    circuit.rz(rng.random(), qubit1)
+                else:
+                    circuit.h(qubit1)
+            with self.subTest(trial=trial):
+                newDag = HERRPeephole.HERRPeephole().run(circuit_to_dag(circuit))
+                self.assertTrue(same_unitary(circuit, dag_to_circuit(newDag)))
+
+    def test_routed_circuits(self):
+        couplingMap = CouplingMaps.grid_coupling_map(2, 4)
+        dag = circuit_to_dag(random_circuit(8, 60, 1))
+        for seed in range(3):
+            for options in ({}, {'lookahead': 2, 'beamWidth': 2}):
+                with self.subTest(seed=seed, **options):
+                    routed = HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap, seed=seed),
+                                       **options).run(dag)
+                    peephole = HERRPeephole.HERRPeephole(couplingMap)
+                    newDag = peephole.run(routed)
+                    self.assertTrue(same_unitary(dag_to_circuit(routed), dag_to_circuit(newDag)))
+                    self.assertEqual(len(routed.named_nodes('swap')) - len(newDag.named_nodes('swap')),
+                                     peephole.property_set['peephole_removed_swaps'] +
+                                     peephole.property_set['peephole_folded_swaps'])
+
+
+if __name__ == '__main__':
+    unittest.main()
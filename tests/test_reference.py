@@ -0,0 +1,39 @@
+import unittest
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+
+import BenchmarkCircuits
+import CouplingMaps
+import HERR
+import HERRReference
+from RoutingCases import random_circuit
+
+"""
+Checks that HERR still routes exactly the same as it was first written (HERRReference.py). Run the tests from the
+repo folder with: python -m unittest discover -s tests
+"""
+
+
+class TestReference(unittest.TestCase):
+
+    def test_same_as_reference(self):
+        gridMap = CouplingMaps.grid_coupling_map(2, 4)
+        cases = [(gridMap, BenchmarkCircuits.make_circuit('bv', 7)[0]),
+                 (gridMap, BenchmarkCircuits.make_circuit('qft', 8)[0]),
+                 (gridMap, random_circuit(8, 60, 1)),
+                 (CouplingMaps.square_coupling_map(), random_circuit(4, 30, 2)),
+                 (CouplingMap.from_grid(3, 4), random_circuit(12, 80, 3))]
+        for index, (couplingMap, circuit) in enumerate(cases):
+            dag = circuit_to_dag(circuit)
+            for seed in range(2):
+                noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=seed)
+                for searchDepth in (1, 2, 3):
+                    with self.subTest(case=index, seed=seed, searchDepth=searchDepth):
+                        expected = HERRReference.HERR(couplingMap, noiseGraph, searchDepth=searchDepth).run(dag)
+                        routed = HERR.HERR(couplingMap, noiseGraph, searchDepth=searchDepth, reliablePaths=False).run(dag)
+                        self.assertEqual(routed, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+
+import CouplingMaps
+import HERR
+from RoutingCases import random_circuit
+
+"""
+Checks that HERR.run_many and imap_run_many give the same circuits and success probabilities as routing one at a time
+"""
+
+
+class TestRunMany(unittest.TestCase):
+
+    def setUp(self):
+        self.couplingMap = CouplingMap.from_grid(3, 3)
+        self.noiseGraph = CouplingMaps.random_noise_graph(self.couplingMap, seed=2)
+        self.dags = [circuit_to_dag(random_circuit(9, 40, seed)) for seed in range(4)]
+
+    def expected(self, **options):
+        results = list()
+        for dag in self.dags:
+            herr = HERR.HERR(self.couplingMap, self.noiseGraph, **options)
+            results.append((herr.run(dag), herr.property_set['herr_success_probability']))
+        return results
+
+    def test_same_as_run(self):
+        for options in ({}, {'reliablePaths': False}, {'parallelLayers': True}, {'lookahead': 2, 'beamWidth': 2}):
+            for workers in (1, 2):
+                with self.subTest(workers=workers, **options):
+                    herr = HERR.HERR(self.couplingMap, self.noiseGraph, **options)
+                    routed = herr.run_many(self.dags, workers=workers)
+                    self.assertEqual(list(zip(routed, herr.property_set['herr_success_probabilities'])),
+                                     self.expected(**options))
+
+    def test_stream(self):
+        # A generator can't be handed to the workers up front, so it takes the streaming path
+        herr = HERR.HERR(self.couplingMap, self.noiseGraph)
+        routed = list(herr.imap_run_many(iter(self.dags), workers=2))
+        self.assertEqual(list(zip(routed, herr.property_set['herr_success_probabilities'])), self.expected())
+
+    def test_two_at_once(self):
+        # A second call starting and finishing while the first is still going mustn't change what either routes
+        herr1 = HERR.HERR(self.couplingMap, self.noiseGraph)
+        herr2 = HERR.HERR(self.couplingMap, self.noiseGraph, reliablePaths=False)
+        first = herr1.imap_run_many(self.dags, workers=2)
+        routed = [next(first)]
+        self.assertEqual(list(herr2.imap_run_many(iter(self.dags), workers=2)),
+                         [routed for routed, successProbability in self.expected(reliablePaths=False)])
+        routed.extend(first)
+        self.assertEqual(list(zip(routed, herr1.property_set['herr_success_probabilities'])), self.expected())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+
+import CouplingMaps
+import HERR
+import HERRReference
+from RoutingCases import random_circuit
+
+"""
+Checks that scalable mode routes the same as the default mode, and the one place HERR knowingly differs from
+HERRReference: find_shortest_path compares qubit numbers by value, where the original compared them with 'is not'
+"""
+
+
+class TestScalable(unittest.TestCase):
+
+    def test_same_as_default(self):
+        cases = [(CouplingMap.from_grid(4, 4), circuit_to_dag(random_circuit(16, 80, 4))),
+                 (CouplingMaps.heavy_hex_coupling_map(3), circuit_to_dag(random_circuit(19, 80, 5)))]
+        for couplingMap, dag in cases:
+            noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=1)
+            for options in ({}, {'reliablePaths': False}, {'parallelLayers': True}, {'lookahead': 2, 'beamWidth': 2}):
+                with self.subTest(size=couplingMap.size(), **options):
+                    expected = HERR.HERR(couplingMap, noiseGraph, **options)
+                    routed = HERR.HERR(couplingMap, noiseGraph, scalable=True, **options)
+                    self.assertEqual(routed.run(dag), expected.run(dag))
+                    self.assertEqual(routed.property_set['herr_success_probability'],
+                                     expected.property_set['herr_success_probability'])
+
+    def test_large_qubit_numbers(self):
+        # Only ints up to 256 are always the same object, so on a device this big the same qubit number can come in
+        # as two different objects. Going from (290, 291) to (291, 441) moves only qubit 0, and which path it takes
+        # shouldn't depend on whether the two 291s are the same object
+        couplingMap = CouplingMap.from_grid(3, 150)
+        noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=0)
+        source, dest = (290, 291), (291, 441)
+        # int(str()) makes a new int object with the same value
+        sourceCopy, destCopy = tuple(int(str(qubit)) for qubit in source), tuple(int(str(qubit)) for qubit in dest)
+        self.assertIsNot(sourceCopy[1], destCopy[0])
+
+        herr = HERR.HERR(couplingMap, noiseGraph, scalable=True, reliablePaths=False)
+        self.assertEqual(herr.find_shortest_path(sourceCopy, destCopy), herr.find_shortest_path(source, dest))
+        # The original took the other branch when the 291s were different objects
+        reference = HERRReference.HERR(couplingMap, noiseGraph)
+        self.assertEqual(reference.find_shortest_path(source, dest), herr.find_shortest_path(source, dest))
+        self.assertNotEqual(reference.find_shortest_path(sourceCopy, destCopy), herr.find_shortest_path(source, dest))
+
+
+if __name__ == '__main__':
+    unittest.main()
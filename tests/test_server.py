@@ -0,0 +1,69 @@
+import asyncio
+import json
+import unittest
+
+from qiskit.transpiler import CouplingMap
+
+import CouplingMaps
+import HERRServer
+
+"""
+Checks the routing server's device registry and that workers are only sent a device when they don't have it yet
+"""
+
+qasm = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[3];\ncx q[0],q[2];\n'
+
+
+def device_request(seed):
+    couplingMap = CouplingMap.from_grid(2, 3)
+    noiseGraph = CouplingMaps.random_noise_graph(couplingMap, seed=seed)
+    return {'op': 'device', 'couplingMap': [list(edge) for edge in couplingMap.get_edges()],
+            'noise': [[qubit1, qubit2, noiseGraph.edges[qubit1, qubit2]['weight']] for qubit1, qubit2 in noiseGraph.edges]}
+
+
+class TestServer(unittest.TestCase):
+
+    def tearDown(self):
+        HERRServer.workerContexts.clear()
+
+    def test_worker_asks_for_device(self):
+        # Without the device, a worker that hasn't set it up says so instead of routing
+        request = device_request(0)
+        device = {'couplingMap': request['couplingMap'], 'noise': request['noise'], 'options': {}}
+        self.assertIsNone(HERRServer.route_in_worker('key', None, qasm, None))
+        routed = HERRServer.route_in_worker('key', device, qasm, None)
+        self.assertEqual(HERRServer.route_in_worker('key', None, qasm, None), routed)
+
+    def test_forgets_least_recently_used_device(self):
+        async def requests():
+            server = HERRServer.RoutingServer(port=0, workers=1, maxDevices=2)
+            await server.start()
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+
+            async def send(request):
+                writer.write(json.dumps(request).encode() + b'\n')
+                return json.loads(await reader.readline())
+
+            try:
+                keys = [(await send(device_request(seed)))['device'] for seed in range(3)]
+                responses = [await send({'op': 'route', 'device': key, 'qasm': qasm}) for key in keys]
+                # Registering again brings it back with the same key
+                responses.append(await send(device_request(0)))
+            finally:
+                # Wait for the server to hang up, so the connection is done with before the server closes
+                writer.write_eof()
+                await reader.read()
+                writer.close()
+                await writer.wait_closed()
+                await server.close()
+            return keys, responses
+
+        keys, responses = asyncio.run(requests())
+        self.assertIn('Unknown device', responses[0]['error'])
+        self.assertIn('qasm', responses[1])
+        self.assertIn('qasm', responses[2])
+        self.assertEqual(responses[3]['device'], keys[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+from qiskit.transpiler.exceptions import TranspilerError
+
+import CouplingMaps
+import HERR
+from RoutingCases import random_circuit
+
+"""
+Checks that HERR.run_sweep gives the same circuits and success probabilities as routing with each noise graph on its own
+"""
+
+
+def edge_accuracies(herr, noiseGraphs):
+    # run_sweep's accuracies array for some noise graphs, one row per graph
+    return np.array([[noiseGraph.edges[edge]['weight'] for edge in herr.uniqueEdges] for noiseGraph in noiseGraphs])
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_same_as_separate_runs(self):
+        cases = [(CouplingMap.from_grid(4, 4), circuit_to_dag(random_circuit(16, 80, 4))),
+                 (CouplingMaps.heavy_hex_coupling_map(3), circuit_to_dag(random_circuit(19, 80, 5)))]
+        for couplingMap, dag in cases:
+            noiseGraphs = [CouplingMaps.random_noise_graph(couplingMap, seed=seed) for seed in range(4)]
+            for options in ({}, {'reliablePaths': False}, {'scalable': True}, {'parallelLayers': True},
+                            {'lookahead': 2, 'beamWidth': 2}):
+                with self.subTest(size=couplingMap.size(), **options):
+                    herr = HERR.HERR(couplingMap, noiseGraphs[0], **options)
+                    routed = herr.run_sweep(dag, edge_accuracies(herr, noiseGraphs))
+                    successProbabilities = herr.property_set['herr_success_probabilities']
+                    for noiseGraph, newDag, successProbability in zip(noiseGraphs, routed, successProbabilities):
+                        expected = HERR.HERR(couplingMap, noiseGraph, **options)
+                        self.assertEqual(newDag, expected.run(dag))
+                        self.assertEqual(successProbability, expected.property_set['herr_success_probability'])
+                    # The sweep leaves HERR routing with its own noise graph again
+                    self.assertEqual(herr.run(dag), HERR.HERR(couplingMap, noiseGraphs[0], **options).run(dag))
+
+    def test_wrong_shape(self):
+        couplingMap = CouplingMap.from_line(4)
+        herr = HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap))
+        with self.assertRaises(TranspilerError):
+            herr.run_sweep(circuit_to_dag(random_circuit(4, 10, 0)), np.ones((2, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter, ParameterVector
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.quantum_info import Operator
+from qiskit.transpiler.exceptions import TranspilerError
+
+import CouplingMaps
+import HERR
+
+"""
+Checks that binding values to a HERRTemplate.RoutingTemplate gives the same circuit as binding them first and routing
+"""
+
+
+class TestTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.couplingMap = CouplingMaps.grid_coupling_map(2, 3)
+        self.noiseGraph = CouplingMaps.random_noise_graph(self.couplingMap, seed=5)
+
+    def check_template(self, circuit, valueSets, **options):
+        template = HERR.HERR(self.couplingMap, self.noiseGraph, **options).route_template(circuit_to_dag(circuit))
+        self.assertEqual(template.parameters, list(circuit.parameters))
+        for values in valueSets:
+            herr = HERR.HERR(self.couplingMap, self.noiseGraph, **options)
+            expected = herr.run(circuit_to_dag(circuit.assign_parameters(values)))
+            self.assertEqual(template.bind(values), expected)
+            self.assertEqual(template.bind(dict(zip(circuit.parameters, values))), expected)
+            self.assertEqual(template.successProbability, herr.property_set['herr_success_probability'])
+        return template
+
+    def test_bind_same_as_route(self):
+        rng = np.random.default_rng(0)
+        theta = ParameterVector('theta', 12)
+        phi = Parameter('phi')
+        circuit = QuantumCircuit(6, 6)
+        for index in range(12):
+            circuit.ry(theta[index], index % 6)
+            qubit1, qubit2 = rng.choice(6, 2, replace=False)
+            if index % 2:
+                circuit.cx(int(qubit1), int(qubit2))
+            else:
+                circuit.rzz(2 * phi, int(qubit1), int(qubit2))
+        circuit.global_phase = phi / 2
+        circuit.measure(range(6), range(6))
+        valueSets = [rng.uniform(0, 6, len(circuit.parameters)).tolist() for trial in range(3)]
+        for options in ({}, {'lookahead': 2}, {'parallelLayers': True}):
+            with self.subTest(**options):
+                self.check_template(circuit, valueSets, **options)
+
+    def test_bind_custom_gates(self):
+        # Gates made with to_gate keep their parameters in their definition too, which has to be bound as well
+        a, b = Parameter('a'), Parameter('b')
+        inner = QuantumCircuit(2)
+        inner.rx(a, 0)
+        inner.cx(0, 1)
+        inner.rz(a + b, 1)
+        outer = QuantumCircuit(2)
+        outer.append(inner.to_gate(), [0, 1])
+        outer.ry(b, 0)
+        gate = outer.to_gate()
+        circuit = QuantumCircuit(4)
+        circuit.h(0)
+        circuit.append(gate, [0, 3])
+        circuit.cx(1, 3)
+        circuit.append(gate, [2, 1])
+        valueSets = [[0.3, 1.1], [2.0, -0.7]]
+        template = self.check_template(circuit, valueSets)
+        for values in valueSets:
+            bound = dag_to_circuit(template.bind(values))
+            expected = dag_to_circuit(HERR.HERR(self.couplingMap, self.noiseGraph).run(
+                circuit_to_dag(circuit.assign_parameters(values))))
+            self.assertTrue(Operator(bound).equiv(Operator(expected)))
+
+    def test_wrong_values(self):
+        a = Parameter('a')
+        circuit = QuantumCircuit(2)
+        circuit.rx(a, 0)
+        circuit.cx(0, 1)
+        template = HERR.HERR(self.couplingMap, self.noiseGraph).route_template(circuit_to_dag(circuit))
+        with self.assertRaises(TranspilerError):
+            template.bind([1, 2])
+        with self.assertRaises(TranspilerError):
+            template.bind({Parameter('b'): 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
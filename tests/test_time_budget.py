@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+
+import CouplingMaps
+import HERR
+from RoutingCases import check_routing, random_circuit
+
+"""
+Checks HERR's time budget: a used up budget routes every gate the BasicSwap way but still gives a routed circuit, and
+one that is never reached changes nothing. Both for run() and run_sweep
+"""
+
+
+class TestTimeBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.couplingMap = CouplingMap.from_grid(3, 3)
+        self.dag = circuit_to_dag(random_circuit(9, 40, 0))
+        self.twoQubitGates = len(self.dag.named_nodes('cx'))
+        self.noiseGraphs = [CouplingMaps.random_noise_graph(self.couplingMap, seed=seed) for seed in range(3)]
+
+    def sweep(self, herr):
+        accuracies = np.array([[noiseGraph.edges[edge]['weight'] for edge in herr.uniqueEdges]
+                               for noiseGraph in self.noiseGraphs])
+        return herr.run_sweep(self.dag, accuracies)
+
+    def test_no_time_left(self):
+        for options in ({}, {'parallelLayers': True}, {'lookahead': 2}):
+            with self.subTest(**options):
+                herr = HERR.HERR(self.couplingMap, self.noiseGraphs[0], timeBudget=0, **options)
+                routed = herr.run(self.dag)
+                self.assertEqual(check_routing(self.dag, routed, self.couplingMap), (True, True))
+                self.assertEqual(herr.property_set['herr_degraded_gates'], self.twoQubitGates)
+
+                routed = self.sweep(herr)
+                self.assertEqual(herr.property_set['herr_degraded_gates_per_trial'], [self.twoQubitGates] * 3)
+                for noiseGraph, newDag in zip(self.noiseGraphs, routed):
+                    self.assertEqual(newDag, HERR.HERR(self.couplingMap, noiseGraph, timeBudget=0, **options).run(self.dag))
+
+    def test_plenty_of_time(self):
+        for options in ({}, {'parallelLayers': True}, {'lookahead': 2}):
+            with self.subTest(**options):
+                herr = HERR.HERR(self.couplingMap, self.noiseGraphs[0], timeBudget=1000, **options)
+                routed = self.sweep(herr)
+                self.assertEqual(herr.property_set['herr_degraded_gates_per_trial'], [0] * 3)
+                for noiseGraph, newDag in zip(self.noiseGraphs, routed):
+                    self.assertEqual(newDag, HERR.HERR(self.couplingMap, noiseGraph, **options).run(self.dag))
+
+
+if __name__ == '__main__':
+    unittest.main()
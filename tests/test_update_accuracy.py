@@ -0,0 +1,43 @@
+import random
+import unittest
+
+from qiskit.converters import circuit_to_dag
+from qiskit.transpiler import CouplingMap
+from qiskit.transpiler.exceptions import TranspilerError
+
+import CouplingMaps
+import HERR
+from RoutingCases import random_circuit
+
+"""
+Checks that after HERR.update_accuracy a HERR routes the same as a new one made with the new noise
+"""
+
+
+class TestUpdateAccuracy(unittest.TestCase):
+
+    def test_same_as_new_herr(self):
+        couplingMap = CouplingMap.from_grid(4, 4)
+        dag = circuit_to_dag(random_circuit(16, 80, 4))
+        for options in ({}, {'reliablePaths': False}, {'parallelLayers': True}, {'lookahead': 2, 'beamWidth': 2}):
+            herr = HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap, seed=0), **options)
+            herr.run(dag)
+            for seed in range(1, 4):
+                with self.subTest(seed=seed, **options):
+                    newNoise = CouplingMaps.random_noise_graph(couplingMap, seed=seed)
+                    changed = random.Random(seed).sample(sorted(newNoise.edges), 5)
+                    herr.update_accuracy({edge: newNoise.edges[edge]['weight'] for edge in changed})
+                    expected = HERR.HERR(couplingMap, herr.qubitAccuracy.copy(), **options)
+                    self.assertEqual(herr.run(dag), expected.run(dag))
+                    self.assertEqual(herr.property_set['herr_success_probability'],
+                                     expected.property_set['herr_success_probability'])
+
+    def test_unknown_edge(self):
+        couplingMap = CouplingMap.from_line(4)
+        herr = HERR.HERR(couplingMap, CouplingMaps.random_noise_graph(couplingMap))
+        with self.assertRaises(TranspilerError):
+            herr.update_accuracy({(0, 2): 0.9})
+
+
+if __name__ == '__main__':
+    unittest.main()